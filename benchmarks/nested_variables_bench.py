@@ -0,0 +1,140 @@
+"""
+render time of handleNestedVariables with a context fetch per placeholder against the per-run context snapshot
+
+    python benchmarks/nested_variables_bench.py --context-kb 500 2000 --placeholders 50 --repeat 5
+
+the template mixes plain dotted paths, paths to list values, paths through lists and missing keys;
+every run first checks the snapshot renders it exactly as the old per-placeholder demisto.get did
+"""
+
+import argparse
+import copy
+import importlib.util
+import json
+import os
+import re
+import statistics
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class FakeDemisto:
+    """The parts of the demisto object the script touches; context() copies, as the script boundary serializes"""
+
+    def __init__(self, context):
+        self._context = context
+        self.context_calls = 0
+
+    def context(self):
+        self.context_calls += 1
+        return copy.deepcopy(self._context)
+
+    @staticmethod
+    def get(obj, field, defaultParam=None):
+        # same walk as the server side demisto.get
+        parts = field.split('.')
+        for part in parts:
+            if obj and part in obj:
+                obj = obj[part]
+            else:
+                return defaultParam
+        return obj
+
+    def debug(self, *args):
+        pass
+
+
+def load_script(fake):
+    # the script is loaded by path, the repo keeps xsoar scripts as flat files rather than a package
+    spec = importlib.util.spec_from_file_location('handleNestedVariables', os.path.join(os.path.dirname(HERE), 'handleNestedVariables.py'))
+    module = importlib.util.module_from_spec(spec)
+    module.demisto = fake
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_context(size_kb: int):
+    alerts = []
+    while len(json.dumps(alerts)) < size_kb * 1024:
+        n = len(alerts)
+        alerts.append({'name': f'alert {n}', 'severity': ['low', 'medium', 'high'][n % 3],
+                       'hosts': [f'host-{n}-{i}.example.com' for i in range(5)], 'raw': 'x' * 400})
+    return {
+        'incident': {'name': 'Phishing report', 'owner': 'analyst', 'labels': ['phishing', 'email']},
+        'Email': {'Subject': 'Invoice', 'To': ['a@example.com', 'b@example.com']},
+        'Alerts': alerts
+    }
+
+
+def synthetic_template(placeholders: int):
+    paths = [
+        'incident.name', 'incident.owner', 'incident.labels', 'Email.Subject', 'Email.To',
+        'Alerts.name', 'Alerts.0.name', 'Alerts.hosts', 'Missing.key', 'incident'
+    ]
+    return {
+        'subject': 'Re: ${Email.Subject} (${incident.name})',
+        'body': [f'line {n}: ${{{paths[n % len(paths)]}}}' for n in range(placeholders)]
+    }
+
+
+def old_process_json(obj, fake):
+    """The script before the snapshot: every placeholder fetched the context again"""
+    if isinstance(obj, dict):
+        return {k: old_process_json(v, fake) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [old_process_json(elem, fake) for elem in obj]
+    if isinstance(obj, str):
+        for match in re.findall(r'\$\{(.*?)\}', obj):
+            value = fake.get(fake.context(), match)
+            obj = obj.replace('${' + match + '}', str('' if value is None else value))
+    return obj
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-placeholder context fetches with the context snapshot')
+    parser.add_argument('--context-kb', nargs='+', type=int, default=[500, 2000], help='Context sizes in KB')
+    parser.add_argument('--placeholders', type=int, default=50, help='Placeholders in the template body')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement; median is reported')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    template = synthetic_template(args.placeholders)
+    results = []
+    for size_kb in args.context_kb:
+        fake = FakeDemisto(synthetic_context(size_kb))
+        script = load_script(fake)
+
+        old, old_timings = timed(lambda: old_process_json(template, fake), args.repeat)
+        new, new_timings = timed(lambda: script.process_json(template, script.ContextSnapshot()), args.repeat)
+        if new != old:
+            changed = [(before[:80], after[:80]) for before, after in zip(old['body'], new['body']) if before != after]
+            raise SystemExit(f'Snapshot rendering differs from demisto.get at {size_kb}KB: {changed[:3]}')
+
+        results.append({
+            'context_kb': size_kb,
+            'per_placeholder_ms': round(statistics.median(old_timings) * 1000, 1),
+            'snapshot_ms': round(statistics.median(new_timings) * 1000, 1),
+            'speedup': round(statistics.median(old_timings) / statistics.median(new_timings), 1)
+        })
+
+    print(f"{'context KB':>10} {'per placeholder ms':>19} {'snapshot ms':>12} {'speedup':>8}")
+    for row in results:
+        print(f"{row['context_kb']:>10} {row['per_placeholder_ms']:>19} {row['snapshot_ms']:>12} {row['speedup']:>7}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'placeholders': args.placeholders, 'repeat': args.repeat, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+parse time of ptrRunWorkflow's full BeautifulSoup form parse against the cached-schema token extraction
+
+    python benchmarks/ptr_form_parse_bench.py --sizes 50 250 1000 --repeat 20
+
+page sizes are in KB; the synthetic pages mimic a TRAP incident page (navigation, an events table,
+inline scripts) with the workflow form near the end
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import secrets
+import statistics
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# the script is loaded by path, the repo keeps xsoar scripts as flat files rather than a package
+_spec = importlib.util.spec_from_file_location('ptrRunWorkflow', os.path.join(os.path.dirname(HERE), 'ptrRunWorkflow.py'))
+ptrRunWorkflow = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(ptrRunWorkflow)
+
+FORM_PAGE_URL = 'https://trap.example.com/forms/myForm'
+
+EVENT_ROW = (
+    '<tr class="event-row" data-event-id="{n}"><td><a href="/incidents/{n}">INC-{n}</a></td>'
+    '<td>Suspicious message reported by user{n}@example.com</td><td><span class="label label-warning">Open</span></td>'
+    '<td>2024-05-{day:02d} 10:{minute:02d}:00 UTC</td><td><input type="checkbox" name="event_ids[]" value="{n}"></td></tr>\n'
+)
+
+
+def synthetic_page(size_kb: int, token: str) -> str:
+    """A TRAP-like page of roughly size_kb with the workflow form after the events table"""
+    head = (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Incident INC-1 | Threat Response</title>'
+        f'<meta name="csrf-param" content="authenticity_token"><meta name="csrf-token" content="{token}">'
+        '<script>window.TRAP = {"user": "svc", "features": ["workflows", "quarantine"]};</script></head><body>'
+        '<nav class="navbar"><ul>' + ''.join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(30)) +
+        '</ul></nav><form name="search" action="/search"><input name="q" value=""></form>'
+        '<table class="table events"><tbody>\n'
+    )
+    form = (
+        '</tbody></table><div class="panel"><form name="new_custom_workflow_execution" action="/custom_workflow_executions" '
+        'method="post" accept-charset="UTF-8"><input name="utf8" type="hidden" value="&#x2713;">'
+        f'<input type="hidden" name="authenticity_token" value="{token}">'
+        '<input type="hidden" name="custom_workflow_execution[incident_id]" value="1">'
+        '<input type="hidden" name="custom_workflow_execution[custom_workflow_id]" value="7">'
+        '<select name="custom_workflow_execution[target]"><option value="all">All</option></select>'
+        '<input type="submit" name="commit" value="Run Workflow" class="btn btn-primary"></form></div>'
+    )
+    tail = '<script>' + 'console.debug("trap");' * 50 + '</script></body></html>'
+
+    rows = []
+    budget = size_kb * 1024 - len(head) - len(form) - len(tail)
+    n = 0
+    while budget > 0:
+        row = EVENT_ROW.format(n=n, day=n % 28 + 1, minute=n % 60)
+        rows.append(row)
+        budget -= len(row)
+        n += 1
+    return head + ''.join(rows) + form + tail
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare full form parsing with cached-schema token extraction')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[50, 250, 1000], help='Page sizes in KB')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement; median and min are reported')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = []
+    for size_kb in args.sizes:
+        token = secrets.token_urlsafe(64)
+        page = synthetic_page(size_kb, token)
+        schema, full = timed(lambda: ptrRunWorkflow.parse_form_schema(page, FORM_PAGE_URL), args.repeat)
+
+        # the next run sees the same form with a fresh token
+        fresh_token = secrets.token_urlsafe(64)
+        next_page = page.replace(token, fresh_token)
+        tokens, fast = timed(lambda: ptrRunWorkflow.extract_tokens(next_page, FORM_PAGE_URL, schema), args.repeat)
+        if tokens != {'authenticity_token': fresh_token}:
+            raise SystemExit(f'Token extraction disagreed with the page at {size_kb}KB: {tokens}')
+
+        results.append({
+            'page_kb': round(len(page) / 1024),
+            'full_parse_ms': round(statistics.median(full) * 1000, 2),
+            'full_parse_min_ms': round(min(full) * 1000, 2),
+            'token_extract_ms': round(statistics.median(fast) * 1000, 3),
+            'token_extract_min_ms': round(min(fast) * 1000, 3),
+            'speedup': round(statistics.median(full) / statistics.median(fast), 1)
+        })
+
+    print(f"{'page KB':>8} {'full parse ms':>14} {'token extract ms':>17} {'speedup':>8}")
+    for row in results:
+        print(f"{row['page_kb']:>8} {row['full_parse_ms']:>14} {row['token_extract_ms']:>17} {row['speedup']:>7}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'repeat': args.repeat, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+build time and page count of triageToPDF's default layout against the compact signature tables
+
+    python benchmarks/triage_compact_bench.py --sizes 5x100 20x300 --max-signatures 25
+"""
+
+import argparse
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import triageToPDF
+from triage_synthetic import best_of, page_count, synthetic_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare default and compact triage PDF layouts')
+    parser.add_argument('--sizes', nargs='+', default=['5x100', '20x300'],
+                        help='Report sizes as <targets>x<signatures per target>')
+    parser.add_argument('--max-signatures', type=int, default=triageToPDF.DEFAULT_LAYOUT['max_signatures'])
+    parser.add_argument('--shared-ratio', type=float, default=0.5,
+                        help='Fraction of each target\'s signatures that also fire on every other target')
+    parser.add_argument('--repeat', type=int, default=1, help='Builds per layout; the fastest is reported')
+    args = parser.parse_args()
+
+    layouts = {
+        'default': {'compact': False},
+        'compact_uncapped': {'compact': True, 'max_signatures': 0},
+        'compact': {'compact': True, 'max_signatures': args.max_signatures}
+    }
+    results = []
+    for size in args.sizes:
+        targets, signatures = (int(part) for part in size.split('x'))
+        data = synthetic_report(targets=targets, signatures=signatures, configs=5,
+                                shared_signature_ratio=args.shared_ratio)
+        for name, layout in layouts.items():
+            pdf, seconds = best_of(lambda: triageToPDF.generate_pdf_report(data, layout=layout), args.repeat)
+            results.append({
+                'size': size,
+                'layout': name,
+                'seconds': round(seconds, 3),
+                'pages': page_count(pdf),
+                'pdf_bytes': len(pdf)
+            })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+peak memory of triageToPDF for entry-file input: json.load + generate_pdf_report
+versus the streaming generate_pdf_report_from_file path
+
+    python benchmarks/triage_memory_bench.py --targets 40 --signatures 400 --configs 200
+
+each measurement runs in a fresh interpreter so ru_maxrss is not polluted by earlier runs
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from triage_synthetic import best_of, peak_rss_mb, run_measurement, write_report
+
+MODES = ('load', 'stream')
+
+
+def measure(mode: str, path: str, trace_heap: bool = False) -> dict:
+    import triageToPDF
+
+    if trace_heap:
+        tracemalloc.start()
+    if mode == 'load':
+        def build():
+            with open(path, 'r') as f:
+                return triageToPDF.generate_pdf_report(json.load(f))
+    else:
+        def build():
+            return triageToPDF.generate_pdf_report_from_file(path)
+    pdf, elapsed = best_of(build)
+
+    result = {
+        'mode': mode,
+        'seconds': round(elapsed, 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'pdf_bytes': len(pdf)
+    }
+    if trace_heap:
+        # tracemalloc slows the build several times over, so seconds are not comparable with it on
+        result['python_heap_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        tracemalloc.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare peak memory of loaded vs streamed triage report rendering')
+    parser.add_argument('--targets', type=int, default=20)
+    parser.add_argument('--signatures', type=int, default=300, help='Signatures per target')
+    parser.add_argument('--configs', type=int, default=100, help='Extracted configs')
+    parser.add_argument('--c2', type=int, default=20, help='C2 entries per extracted config')
+    parser.add_argument('--trace-heap', action='store_true', help='Also report the Python heap peak via tracemalloc')
+    parser.add_argument('--measure', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--input', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.input, args.trace_heap)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'overview.json')
+        size = write_report(path, targets=args.targets, signatures=args.signatures,
+                            configs=args.configs, c2_per_config=args.c2)
+        results = []
+        for mode in MODES:
+            arguments = [mode, '--input', path] + (['--trace-heap'] if args.trace_heap else [])
+            results.append(run_measurement(os.path.abspath(__file__), arguments))
+
+    print(json.dumps({
+        'input_mb': round(size / 1024 / 1024, 1),
+        'targets': args.targets,
+        'signatures_per_target': args.signatures,
+        'configs': args.configs,
+        'results': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
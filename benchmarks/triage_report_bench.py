@@ -0,0 +1,156 @@
+"""
+benchmark suite for triageToPDF.generate_pdf_report across report sizes
+
+runs every combination of --targets x --signatures x --c2 in its own interpreter and
+records wall time, peak RSS, PDF size and page count; results can be saved as a
+baseline and later runs compared against it
+
+    python benchmarks/triage_report_bench.py --baseline --tolerance 0.15
+    python benchmarks/triage_report_bench.py --save-baseline
+
+without a path both use benchmarks/triage_report_baseline.json, which holds the default grid
+(default layout, dict source); timings are machine-specific, so re-record it with --save-baseline
+before comparing on different hardware
+
+exits 1 when any configuration is slower or heavier than the baseline by more than the tolerance
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from triage_synthetic import best_of, page_count, peak_rss_mb, run_measurement, synthetic_report, write_report
+
+DEFAULT_BASELINE = os.path.join(HERE, 'triage_report_baseline.json')
+
+# metrics compared against the baseline; pdf size is informational only
+COMPARED_METRICS = ('seconds', 'peak_rss_mb')
+
+
+def config_name(targets: int, signatures: int, c2: int, layout: str, source: str) -> str:
+    return f"targets={targets} signatures={signatures} c2={c2} layout={layout} source={source}"
+
+
+def measure(args) -> dict:
+    """Child process: build one synthetic report and render it args.repeat times"""
+    import triageToPDF
+
+    layout = {'compact': args.layout == 'compact'}
+    options = dict(targets=args.targets[0], signatures=args.signatures[0], configs=args.configs,
+                   c2_per_config=args.c2[0])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'overview.json')
+        if args.source == 'file':
+            input_bytes = write_report(path, **options)
+            pdf, seconds = best_of(lambda: triageToPDF.generate_pdf_report_from_file(path, layout=layout), args.repeat)
+        else:
+            data = synthetic_report(**options)
+            input_bytes = len(json.dumps(data))
+            pdf, seconds = best_of(lambda: triageToPDF.generate_pdf_report(data, layout=layout), args.repeat)
+
+    return {
+        'seconds': round(seconds, 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'pdf_bytes': len(pdf),
+        'pages': page_count(pdf),
+        'input_bytes': input_bytes
+    }
+
+
+def run_suite(args) -> dict:
+    results = {}
+    for targets, signatures, c2 in itertools.product(args.targets, args.signatures, args.c2):
+        name = config_name(targets, signatures, c2, args.layout, args.source)
+        results[name] = run_measurement(os.path.abspath(__file__), [
+            '--targets', str(targets), '--signatures', str(signatures), '--c2', str(c2),
+            '--configs', str(args.configs), '--layout', args.layout, '--source', args.source,
+            '--repeat', str(args.repeat)
+        ], timeout=args.timeout)
+        print(f"{name}: {results[name]['seconds']}s, {results[name]['peak_rss_mb']} MB RSS, "
+              f"{results[name]['pages']} pages", file=sys.stderr)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print a comparison table; True when nothing regressed beyond tolerance"""
+    ok = True
+    header = f"{'configuration':<68} {'metric':<12} {'baseline':>10} {'current':>10} {'change':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<68} {'(new)':<12}")
+            continue
+        for metric in COMPARED_METRICS + ('pdf_bytes',):
+            before, after = previous.get(metric), current.get(metric)
+            if not before:
+                continue
+            change = (after - before) / before
+            flag = ''
+            if metric in COMPARED_METRICS and change > tolerance:
+                flag = '  REGRESSION'
+                ok = False
+            print(f"{name:<68} {metric:<12} {before:>10} {after:>10} {change:>+7.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark triage PDF generation across report sizes')
+    parser.add_argument('--targets', type=int, nargs='+', default=[1, 10, 40])
+    parser.add_argument('--signatures', type=int, nargs='+', default=[20, 200], help='Signatures per target')
+    parser.add_argument('--c2', type=int, nargs='+', default=[10, 200], help='C2 entries per extracted config')
+    parser.add_argument('--configs', type=int, default=20, help='Extracted configs per report')
+    parser.add_argument('--layout', choices=['default', 'compact'], default='default')
+    parser.add_argument('--source', choices=['dict', 'file'], default='dict',
+                        help='Render from a parsed dict or stream from a file on disk')
+    parser.add_argument('--repeat', type=int, default=1, help='Builds per configuration; the fastest is kept')
+    parser.add_argument('--timeout', type=float, default=600, help='Seconds allowed per configuration')
+    parser.add_argument('--output', help='Write this run\'s results as JSON')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE,
+                        help='Write or update a baseline file with this run\'s results (default: %(const)s)')
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE,
+                        help='Baseline file to compare against (default: %(const)s)')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed fractional increase in seconds/peak RSS before flagging (default: 0.2)')
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args)))
+        return
+
+    results = run_suite(args)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        # merge, so baselines for other grids or layouts survive a partial run
+        stored = {}
+        if os.path.exists(args.save_baseline):
+            with open(args.save_baseline) as f:
+                stored = json.load(f)
+        stored.update(results)
+        with open(args.save_baseline, 'w') as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+    elif not args.output:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
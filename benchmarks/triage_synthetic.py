@@ -0,0 +1,129 @@
+"""
+synthetic Hatching Triage overview documents for benchmarking triageToPDF
+shaped like real /overview.json output; every dimension that drives report size is a parameter
+
+also holds the measurement helpers shared by the triage_*_bench.py scripts
+"""
+
+import json
+import random
+import hashlib
+import re
+import resource
+import subprocess
+import sys
+import time
+
+FAMILIES = ['asyncrat', 'agenttesla', 'formbook', 'redline', 'lumma', 'cobaltstrike', 'qakbot']
+SIGNATURE_NAMES = [
+    'Checks computer location settings', 'Enumerates physical storage devices',
+    'Suspicious use of SetWindowsHookEx', 'Uses the VBS compiler for execution',
+    'Drops startup file', 'Reads user/profile data of web browsers', 'Looks up external IP address',
+    'Accesses cryptocurrency files/wallets', 'Modifies registry run keys', 'Creates scheduled task(s)'
+]
+
+
+def _hashes(seed: str):
+    return {
+        'md5': hashlib.md5(seed.encode()).hexdigest(),
+        'sha1': hashlib.sha1(seed.encode()).hexdigest(),
+        'sha256': hashlib.sha256(seed.encode()).hexdigest(),
+        'sha512': hashlib.sha512(seed.encode()).hexdigest()
+    }
+
+
+def synthetic_report(targets: int = 1, signatures: int = 20, configs: int = 1, c2_per_config: int = 5,
+                     shared_signature_ratio: float = 0.5, seed: int = 0):
+    """
+    Build one triage report dict.
+    signatures is per target; shared_signature_ratio of them reuse names common to all
+    targets, the way real multi-target reports repeat the same behaviours.
+    """
+    rng = random.Random(seed)
+    shared = int(signatures * shared_signature_ratio)
+
+    def signature(name, score):
+        return {
+            'name': name,
+            'score': score,
+            'desc': f'{name}. ' + ' '.join(rng.choice(['process', 'registry', 'network', 'file', 'memory'])
+                                           for _ in range(20)),
+            'tags': rng.sample(['discovery', 'persistence', 'stealer', 'spyware', 'evasion'], 2)
+        }
+
+    report_targets = []
+    for t in range(targets):
+        sigs = [signature(f'{SIGNATURE_NAMES[i % len(SIGNATURE_NAMES)]} #{i}', (i * 7) % 10 + 1)
+                for i in range(shared)]
+        sigs += [signature(f'Target {t} behaviour {i}', rng.randint(1, 10)) for i in range(signatures - shared)]
+        report_targets.append(dict(
+            _hashes(f'{seed}-target-{t}'),
+            target=f'payload_{t}.exe',
+            score=rng.randint(1, 10),
+            size=rng.randint(10000, 5000000),
+            tags=['family:' + rng.choice(FAMILIES), 'stealer'],
+            family=[rng.choice(FAMILIES)],
+            signatures=sigs
+        ))
+
+    extracted = [
+        {
+            'tasks': ['behavioral1'],
+            'dumped_file': f'memory/{c}-0x400000.dmp',
+            'resource': f'behavioral1/memory/{c}',
+            'config': {
+                'family': rng.choice(FAMILIES),
+                'version': f'{rng.randint(1, 5)}.{rng.randint(0, 9)}',
+                'botnet': f'botnet-{c}',
+                'c2': [f'{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}:{rng.randint(1024, 65535)}'
+                       for _ in range(c2_per_config)],
+                'keys': [{'kind': 'aes.key', 'value': hashlib.sha256(f'{seed}-key-{c}'.encode()).hexdigest()}]
+            }
+        }
+        for c in range(configs)
+    ]
+
+    return {
+        'sample': dict(_hashes(f'{seed}-sample'), id=f'{seed:06d}-synthetic', target='sample.zip', size=123456),
+        'tasks': {f'behavioral{t + 1}': {'kind': 'behavioral', 'status': 'reported'} for t in range(targets)},
+        'analysis': {'score': 10, 'family': FAMILIES[:2], 'tags': ['stealer']},
+        'targets': report_targets,
+        'extracted': extracted
+    }
+
+
+def write_report(path: str, **options) -> int:
+    """Write a synthetic report to path; returns its size in bytes"""
+    body = json.dumps(synthetic_report(**options))
+    with open(path, 'w') as f:
+        f.write(body)
+    return len(body)
+
+
+def page_count(pdf: bytes) -> int:
+    # the page tree root carries the total; reportlab writes it once
+    match = re.search(rb'/Count (\d+)', pdf)
+    return int(match.group(1)) if match else 0
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def best_of(build, repeat: int = 1):
+    """Run build() repeat times; returns (last result, fastest seconds)"""
+    timings = []
+    result = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = build()
+        timings.append(time.perf_counter() - started)
+    return result, min(timings)
+
+
+def run_measurement(script: str, arguments, timeout: float = None) -> dict:
+    """Run script's hidden --measure mode in a fresh interpreter so ru_maxrss only covers that build"""
+    out = subprocess.run([sys.executable, script, '--measure', *arguments],
+                         check=True, capture_output=True, text=True, timeout=timeout)
+    return json.loads(out.stdout)
@@ -16,88 +16,522 @@ pre-reqs:
 notes:
 - confirms the resolve alert option is set to 'yes'
 - this script will attempt to close both incidents and detections
+- every id in alertid and the CrowdStrike.Incident / CrowdStrike.Detection context is resolved,
+  in multi-id commands of `chunk_size` ids (default 100) with up to `max_concurrency` (default 4) in flight
+- deferred mode (`deferred` = true) only records the resolve request on the closed incident and returns
+  straight away, so closing never waits on falcon; see deferred mode below
 - docker image used: demisto/python3:3.12.8.1983910
+
+deferred mode:
+- incident fields created:
+    - CrowdStrike Resolve Status (crowdstrikeresolvestatus), short text: Pending, Resolved or Failed
+    - CrowdStrike Resolve Request (crowdstrikeresolverequest), long text: the queued request as JSON
+- a job (e.g. every 5 minutes) that runs this script with `drain_deferred` = true; it finds the pending
+  incidents, merges their ids across incidents and resolves them in bulk
+- optional job arguments:
+    - `chunk_size` / `max_concurrency`: as above
+    - `max_attempts`: runs an id is retried before its request is marked Failed (default 5)
+    - `backoff_seconds` / `max_backoff_seconds`: retry delay, doubled per failed attempt (default 60 / 3600)
+- every request lives on its own incident, so concurrent closes and the job never overwrite each other
+- failed ids stay pending and are retried once their backoff has passed; a request still failing after
+  `max_attempts` is marked Failed with its remaining ids and last error, set it back to Pending to retry
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import json
+import re
+import time
 import traceback
 
+# falcon incident ids look like inc:<cid>:<hash>; anything else in alertid is a detection (ldt:...)
+INCIDENT_ID_PREFIX = 'inc:'
+
+# ids per cs-falcon-resolve-* call, and how many of those calls run at once
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_MAX_CONCURRENCY = 4
+
+# deferred mode keeps each resolve request on the incident that queued it
+REQUEST_FIELD = 'crowdstrikeresolverequest'
+REQUEST_STATUS_FIELD = 'crowdstrikeresolvestatus'
+STATUS_PENDING = 'Pending'
+STATUS_RESOLVED = 'Resolved'
+STATUS_FAILED = 'Failed'
+PENDING_PAGE_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 60
+DEFAULT_MAX_BACKOFF_SECONDS = 3600
+
+RESOLVE_COMMANDS = {
+    'incident': ('cs-falcon-resolve-incident', 'Closed'),
+    'detection': ('cs-falcon-resolve-detection', 'closed')
+}
+
+# falcon answers a batch holding a bad id with one of these statuses; only they are worth bisecting on
+PER_ID_REJECTION_PATTERN = re.compile(r'\b(400|404|422)\b')
+
+# errors that are about the request rather than any id in it, even when they carry a rejection status:
+# auth, a missing or disabled `using` instance, throttling, server errors, timeouts and connection failures
+SYSTEMIC_ERROR_PATTERN = re.compile(
+    r'\b(401|403|429|5\d\d)\b|unauthori[sz]ed|forbidden|invalid (api )?credentials|authenticat'
+    r'|instance\b.{0,80}\b(not found|does not exist|is disabled)|no (enabled |active )?instances?\b'
+    r'|rate limit|too many requests|service unavailable'
+    r'|timed? ?out|connection (error|refused|reset|aborted)|max retries exceeded',
+    re.IGNORECASE
+)
+
 def is_error(result):
     return result['Type'] == entryTypes['error']
 
 def get_error(result):
     return result.get('Contents', '')
 
-def get_crowdstrike_ids():
+def as_id_list(value) -> List[str]:
+    """Flatten a field or context value (single id, comma separated string or nested lists) to ids"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [item for element in value for item in as_id_list(element)]
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(',') if part.strip()]
+    return [str(value)]
 
-    incident_id = demisto.incident().get('Custom Fields', {}).get('alertid') or \
-                  demisto.get(demisto.context(), 'CrowdStrike.Incident.id')
-    detection_id = demisto.incident().get('Custom Fields', {}).get('alertid') or \
-                  demisto.get(demisto.context(), 'CrowdStrike.Detection.id')
-    
-    # handle lists
-    if isinstance(incident_id, list) and incident_id:
-        incident_id = incident_id[0]
+class ContextSnapshot:
+    """
+    Fetches the investigation context (and incident) once per run and memoizes path lookups.
+    Every demisto.context() call serializes the whole context across the script boundary,
+    which adds up quickly on incidents with multi-MB context.
 
-    if isinstance(detection_id, list) and detection_id:
-        detection_id = detection_id[0]
+    paths:
+    - dotted: CrowdStrike.Incident.id, descending into lists (returns a list of matches)
+    - list indexing: Alerts.0.name or Alerts[0].name, negative indexes allowed
+    - DT expressions: Alerts(val.severity == 'high').name, evaluated once through demisto.dt
 
-    return incident_id, detection_id
+    values are shared with the cache, so treat them as read-only
+    """
 
-def close_crowdstrike_incident(incident_id, close_code, xsoar_id, source_instance, status="Closed"):
-    
-    try:
-        response = demisto.executeCommand(
-            "cs-falcon-resolve-incident", {
-                "ids": incident_id, 
-                "status": status, 
-                "tag": close_code, 
-                "comment": "Closed by XSOAR automation [#${xsoar_id}]", 
-                "using": source_instance
-                }
-        )
-        if is_error(response[0]):
-            demisto.error(f"Failed to close CrowdStrike Falcon incident {incident_id}: {get_error(response[0])}")
-            return None
+    def __init__(self, context=None, incident=None):
+        self._context = context
+        self._incident = incident
+        self._values: Dict[str, Any] = {}
+        self._nodes: Dict[Tuple[str, ...], Tuple[List[Any], bool]] = {}
+        self.stats = {
+            'fetches': 0, 'fetch_seconds': 0.0,
+            'hits': 0, 'hit_seconds': 0.0,
+            'misses': 0, 'miss_seconds': 0.0
+        }
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        if self._context is None:
+            start = time.perf_counter()
+            self._context = demisto.context() or {}
+            self.stats['fetches'] += 1
+            self.stats['fetch_seconds'] += time.perf_counter() - start
+        return self._context
+
+    @property
+    def incident(self) -> Dict[str, Any]:
+        if self._incident is None:
+            start = time.perf_counter()
+            self._incident = demisto.incident() or {}
+            self.stats['fetches'] += 1
+            self.stats['fetch_seconds'] += time.perf_counter() - start
+        return self._incident
+
+    def get(self, path, default=None):
+        self.context  # fetch outside the lookup timings, it is reported separately
+        start = time.perf_counter()
+        if path in self._values:
+            value = self._values[path]
+            self.stats['hits'] += 1
+            self.stats['hit_seconds'] += time.perf_counter() - start
         else:
-            demisto.info(f"Successfully closed CrowdStrike Falcon incident {incident_id} with status: {status}")
-            return response[0].get('Contents')
+            value = self._values[path] = self._resolve(path)
+            self.stats['misses'] += 1
+            self.stats['miss_seconds'] += time.perf_counter() - start
+        return default if value is None else value
 
-    except Exception as e:
-        demisto.error(f"Error closing CrowdStrike Falcon incident {incident_id}: {traceback.format_exc()}")
-        return None
+    def summary(self) -> str:
+        stats = self.stats
+        lookups = stats['hits'] + stats['misses']
+        return (f"context snapshot: {stats['fetches']} fetch(es) in {stats['fetch_seconds'] * 1000:.1f}ms, "
+                f"{lookups} lookup(s), {stats['hits']} hit(s) in {stats['hit_seconds'] * 1000:.2f}ms, "
+                f"{stats['misses']} miss(es) in {stats['miss_seconds'] * 1000:.2f}ms")
+
+    def _resolve(self, path):
+        if '(' in path:
+            return demisto.dt(self.context, path)
+        parts = tuple(part for part in re.sub(r'\[(-?\d+)\]', r'.\1', path).split('.') if part)
+        values, fanned_out = self._node(parts)
+        if not values:
+            return None
+        return values if fanned_out else values[0]
+
+    def _node(self, parts) -> Tuple[List[Any], bool]:
+        """Values matching a path prefix; prefixes are cached so sibling paths share the walk"""
+        if not parts:
+            return [self.context], False
+        node = self._nodes.get(parts)
+        if node is None:
+            values, fanned_out = self._node(parts[:-1])
+            part = parts[-1]
+            next_values = []
+            for value in values:
+                if isinstance(value, list) and re.fullmatch(r'-?\d+', part):
+                    if -len(value) <= int(part) < len(value):
+                        next_values.append(value[int(part)])
+                    continue
+                if isinstance(value, list):
+                    fanned_out = True
+                for item in (value if isinstance(value, list) else [value]):
+                    if isinstance(item, dict) and item.get(part) is not None:
+                        next_values.append(item[part])
+            node = self._nodes[parts] = (next_values, fanned_out)
+        return node
+
+def get_crowdstrike_ids(snapshot) -> Tuple[List[str], List[str]]:
+    """Every linked falcon incident and detection id, deduplicated in first-seen order"""
+    custom_fields = snapshot.incident.get('CustomFields') or snapshot.incident.get('Custom Fields') or {}
 
-def close_crowdstrike_detection(detection_id, close_code, xsoar_id, source_instance, status="closed"):
+    incident_ids: Dict[str, bool] = {}
+    detection_ids: Dict[str, bool] = {}
+    for crowdstrike_id in as_id_list(custom_fields.get('alertid')):
+        target = incident_ids if crowdstrike_id.startswith(INCIDENT_ID_PREFIX) else detection_ids
+        target[crowdstrike_id] = True
+    for crowdstrike_id in as_id_list(snapshot.get('CrowdStrike.Incident.id')):
+        incident_ids[crowdstrike_id] = True
+    for crowdstrike_id in as_id_list(snapshot.get('CrowdStrike.Detection.id')):
+        detection_ids[crowdstrike_id] = True
 
+    return list(incident_ids), list(detection_ids)
+
+class SystemicResolveError(Exception):
+    """A resolve failure that is not a per-id rejection (auth, unknown instance, throttling, outage), so bisecting cannot help"""
+
+def resolve_crowdstrike_ids(kind, ids, close_code, xsoar_ids, source_instance) -> Optional[str]:
+    """
+    Resolve a batch of incidents or detections in one command; returns the error text, or None on success.
+    Raises SystemicResolveError unless the command failed with a per-id rejection.
+    """
+    command, status = RESOLVE_COMMANDS[kind]
     try:
         response = demisto.executeCommand(
-            "cs-falcon-resolve-detection", {
-                "ids": detection_id,
+            command, {
+                "ids": ",".join(ids),
                 "status": status,
                 "tag": close_code,
-                "comment": f"Closed by XSOAR automation [#${xsoar_id}]",
+                "comment": f"Closed by XSOAR automation [{', '.join('#' + str(xsoar_id) for xsoar_id in xsoar_ids)}]",
                 "using": source_instance
             }
         )
-        if is_error(response[0]):
-            demisto.error(f"Failed to close CrowdStrike Falcon detection {detection_id}: {get_error(response[0])}")
-            return None
-        else:
-            demisto.info(f"Successfully closed CrowdStrike Falcon detection {detection_id} with status: {status}")
-            return response[0].get('Contents')
-    
     except Exception as e:
-        demisto.error(f"Error closing CrowdStrike Falcon detection {detection_id}: {traceback.format_exc()}")
+        demisto.error(f"Error closing CrowdStrike Falcon {kind}s {ids}: {traceback.format_exc()}")
+        raise SystemicResolveError(str(e))
+
+    errors = [get_error(entry) for entry in response if is_error(entry)]
+    if not errors:
         return None
+    error = "; ".join(str(error) for error in errors)
+    # anything but a per-id rejection fails the chunk once; splitting would only repeat it against a struggling api
+    if SYSTEMIC_ERROR_PATTERN.search(error) or not PER_ID_REJECTION_PATTERN.search(error):
+        raise SystemicResolveError(error)
+    return error
+
+def isolate_failures(kind, ids, error, close_code, xsoar_ids, source_instance, outcomes) -> Dict[str, Optional[str]]:
+    """
+    Split a rejected batch in half and retry each half until every refused id stands alone.
+    falcon answers any batch holding a bad id with the same generic error, so a failing half
+    says nothing about the ids in it and is always bisected down to single ids.
+    Outcomes are recorded into `outcomes` as they are learnt, so the ids already closed survive
+    a SystemicResolveError part way through.
+    """
+    if len(ids) == 1:
+        outcomes[ids[0]] = error
+        return outcomes
+
+    middle = len(ids) // 2
+    for half in (ids[:middle], ids[middle:]):
+        half_error = resolve_crowdstrike_ids(kind, half, close_code, xsoar_ids, source_instance)
+        if half_error is None:
+            outcomes.update({crowdstrike_id: None for crowdstrike_id in half})
+        else:
+            isolate_failures(kind, half, half_error, close_code, xsoar_ids, source_instance, outcomes)
+    return outcomes
+
+def resolve_chunk(kind, ids, close_code, xsoar_ids, source_instance) -> Dict[str, Optional[str]]:
+    """Resolve one chunk of ids in a single command, returning {id: error or None}"""
+    outcomes: Dict[str, Optional[str]] = {}
+    error = None
+    try:
+        error = resolve_crowdstrike_ids(kind, ids, close_code, xsoar_ids, source_instance)
+        if error is None:
+            outcomes.update({crowdstrike_id: None for crowdstrike_id in ids})
+        else:
+            isolate_failures(kind, ids, error, close_code, xsoar_ids, source_instance, outcomes)
+    except SystemicResolveError as e:
+        # nothing more can be learnt from falcon this run, the ids not yet settled all fail with it
+        error = str(e)
+    outcomes = {crowdstrike_id: outcomes[crowdstrike_id] if crowdstrike_id in outcomes else error for crowdstrike_id in ids}
+
+    failed = [crowdstrike_id for crowdstrike_id, outcome in outcomes.items() if outcome is not None]
+    if failed:
+        demisto.error(f"Failed to close CrowdStrike Falcon {kind}(s) {', '.join(failed)}: {error}")
+    if len(failed) < len(ids):
+        demisto.info(f"Successfully closed {len(ids) - len(failed)} CrowdStrike Falcon {kind}(s)")
+    return outcomes
+
+def resolve_all(incident_ids, detection_ids, close_code, xsoar_id, source_instance,
+                chunk_size=DEFAULT_CHUNK_SIZE, max_concurrency=DEFAULT_MAX_CONCURRENCY) -> List[Dict[str, Any]]:
+    """Resolve every id in chunked multi-id commands, a bounded number in flight; one outcome row per id"""
+    chunks = [
+        (kind, ids[start:start + chunk_size])
+        for kind, ids in (('incident', incident_ids), ('detection', detection_ids))
+        for start in range(0, len(ids), chunk_size)
+    ]
+    outcomes: Dict[str, Optional[str]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(chunks) or 1))) as pool:
+        futures = [
+            (kind, pool.submit(resolve_chunk, kind, chunk, close_code, [xsoar_id], source_instance))
+            for kind, chunk in chunks
+        ]
+        kinds = {}
+        for kind, future in futures:
+            chunk_outcomes = future.result()
+            outcomes.update(chunk_outcomes)
+            kinds.update({crowdstrike_id: kind for crowdstrike_id in chunk_outcomes})
+
+    return [
+        {
+            'ID': crowdstrike_id,
+            'Type': kinds[crowdstrike_id],
+            'Status': 'Resolved' if error is None else 'Failed',
+            'Error': error or ''
+        }
+        for crowdstrike_id, error in outcomes.items()
+    ]
+
+def report_outcomes(outcomes):
+    failed = sum(1 for outcome in outcomes if outcome['Status'] == 'Failed')
+    title = f"CrowdStrike Falcon resolution: {len(outcomes) - failed} resolved, {failed} failed"
+    demisto.results({
+        'Type': entryTypes['note'],
+        'ContentsFormat': formats['json'],
+        'Contents': outcomes,
+        'HumanReadable': tableToMarkdown(title, outcomes, headers=['ID', 'Type', 'Status', 'Error']),
+        'EntryContext': {'CrowdStrikePostProcessing.Resolution(val.ID && val.ID == obj.ID)': outcomes}
+    })
+
+def store_request(xsoar_id, status, request=None):
+    """Write a request's status (and the request itself, when given) to its xsoar incident"""
+    fields = {'id': xsoar_id, REQUEST_STATUS_FIELD: status}
+    if request is not None:
+        fields[REQUEST_FIELD] = json.dumps(request)
+    response = demisto.executeCommand("setIncident", fields)
+    if is_error(response[0]):
+        raise ValueError(f"Could not store the CrowdStrike Falcon resolve request on XSOAR incident {xsoar_id}: "
+                         f"{get_error(response[0])}")
+
+def enqueue_resolution(incident_ids, detection_ids, close_code, xsoar_id, source_instance):
+    """
+    Record a resolve request on the incident being closed.
+    Each incident only ever writes its own request, so concurrent closes cannot overwrite one another.
+    """
+    request = {
+        'source_instance': source_instance,
+        'close_code': close_code,
+        'incident_ids': incident_ids,
+        'detection_ids': detection_ids,
+        'queued_at': int(time.time()),
+        'attempts': 0,
+        'next_attempt': 0
+    }
+    store_request(xsoar_id, STATUS_PENDING, request)
+
+def find_pending_requests() -> List[Dict[str, Any]]:
+    """Every pending resolve request, read from the incidents that queued them; each carries its xsoar_id"""
+    incidents: Dict[str, Dict[str, Any]] = {}
+    page = 0
+    while True:
+        response = demisto.executeCommand("getIncidents", {
+            'query': f'{REQUEST_STATUS_FIELD}:"{STATUS_PENDING}"',
+            'page': page,
+            'size': PENDING_PAGE_SIZE
+        })
+        if is_error(response[0]):
+            raise ValueError(f"Could not search for pending CrowdStrike Falcon resolve requests: {get_error(response[0])}")
+        data = (response[0].get('Contents') or {}).get('data') or []
+        incidents.update({incident['id']: incident for incident in data})
+        if len(data) < PENDING_PAGE_SIZE:
+            break
+        page += 1
+
+    requests = []
+    for xsoar_id, incident in incidents.items():
+        custom_fields = incident.get('CustomFields') or {}
+        try:
+            request = json.loads(custom_fields.get(REQUEST_FIELD) or 'null')
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            # retrying cannot fix an unreadable request, take it out of the pending set
+            demisto.error(f"XSOAR incident {xsoar_id} has an unreadable CrowdStrike Falcon resolve request, marking it failed")
+            try:
+                store_request(xsoar_id, STATUS_FAILED)
+            except ValueError as e:
+                demisto.error(str(e))
+            continue
+        requests.append(dict(request, xsoar_id=xsoar_id))
+    return requests
+
+def group_key(kind, request) -> Tuple[str, str, str]:
+    return kind, request.get('source_instance') or '', request.get('close_code') or ''
+
+def group_requests(requests) -> Dict[Tuple[str, str, str], Dict[str, List[str]]]:
+    """
+    Merge pending requests across xsoar incidents.
+    Ids sharing a command, instance and close code go out together; each id maps to the
+    xsoar incidents that asked for it so the closing comment can reference them all.
+    """
+    groups: Dict[Tuple[str, str, str], Dict[str, List[str]]] = {}
+    for request in requests:
+        for kind, ids in (('incident', request.get('incident_ids') or []), ('detection', request.get('detection_ids') or [])):
+            group = groups.setdefault(group_key(kind, request), {})
+            for crowdstrike_id in ids:
+                requesters = group.setdefault(crowdstrike_id, [])
+                if request['xsoar_id'] not in requesters:
+                    requesters.append(request['xsoar_id'])
+    return groups
+
+def resolve_groups(groups, chunk_size, max_concurrency) -> Dict[Tuple[Tuple[str, str, str], str], Optional[str]]:
+    """Resolve every merged group in chunks, a bounded number in flight; {(group, id): error or None}"""
+    jobs = []
+    for (kind, source_instance, close_code), requesters in groups.items():
+        ids = list(requesters)
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            xsoar_ids = list(dict.fromkeys(xsoar_id for crowdstrike_id in chunk for xsoar_id in requesters[crowdstrike_id]))
+            jobs.append(((kind, source_instance, close_code), (kind, chunk, close_code, xsoar_ids, source_instance)))
+
+    outcomes: Dict[Tuple[Tuple[str, str, str], str], Optional[str]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(jobs) or 1))) as pool:
+        futures = [(key, pool.submit(resolve_chunk, *job)) for key, job in jobs]
+        for key, future in futures:
+            for crowdstrike_id, error in future.result().items():
+                outcomes[(key, crowdstrike_id)] = error
+    return outcomes
+
+def backoff_delay(attempts, backoff_seconds, max_backoff_seconds) -> int:
+    return int(min(max_backoff_seconds, backoff_seconds * 2 ** max(0, attempts - 1)))
+
+def apply_outcomes(requests, outcomes, now, max_attempts, backoff_seconds, max_backoff_seconds):
+    """
+    Work out each request's new state: a request keeps only its failed ids and is pushed back by
+    an exponential backoff; one out of attempts is marked failed with the ids it could not close.
+    Returns the (xsoar id, status, request) updates and the report rows.
+    """
+    updates = []
+    rows = []
+    for request in requests:
+        remaining = {'incident_ids': [], 'detection_ids': []}
+        errors = []
+        request_rows = []
+        for kind, key in (('incident', 'incident_ids'), ('detection', 'detection_ids')):
+            for crowdstrike_id in request.get(key) or []:
+                error = outcomes.get((group_key(kind, request), crowdstrike_id))
+                if error is None:
+                    request_rows.append({'XSOAR ID': request['xsoar_id'], 'ID': crowdstrike_id, 'Type': kind, 'Status': 'Resolved', 'Error': ''})
+                else:
+                    remaining[key].append(crowdstrike_id)
+                    errors.append(error)
+                    request_rows.append({'XSOAR ID': request['xsoar_id'], 'ID': crowdstrike_id, 'Type': kind, 'Status': 'Failed', 'Error': error})
+        rows.extend(request_rows)
+
+        if not errors:
+            updates.append((request['xsoar_id'], STATUS_RESOLVED, dict(request, last_error='')))
+            continue
+
+        attempts = int(request.get('attempts') or 0) + 1
+        status = STATUS_PENDING
+        if attempts >= max_attempts:
+            demisto.error(f"Giving up on CrowdStrike Falcon resolve for XSOAR incident {request['xsoar_id']} "
+                          f"after {attempts} attempts: {errors[0]}")
+            for row in request_rows:
+                if row['Status'] == 'Failed':
+                    row['Status'] = 'Abandoned'
+            status = STATUS_FAILED
+
+        updates.append((request['xsoar_id'], status, dict(
+            request,
+            **remaining,
+            attempts=attempts,
+            next_attempt=now + backoff_delay(attempts, backoff_seconds, max_backoff_seconds),
+            last_error=errors[0]
+        )))
+    return updates, rows
+
+def drain_deferred_requests(args):
+    """Job mode: resolve the pending deferred requests of every incident in bulk and record the results on them"""
+    chunk_size = int(args.get('chunk_size') or DEFAULT_CHUNK_SIZE)
+    max_concurrency = int(args.get('max_concurrency') or DEFAULT_MAX_CONCURRENCY)
+    max_attempts = int(args.get('max_attempts') or DEFAULT_MAX_ATTEMPTS)
+    backoff_seconds = int(args.get('backoff_seconds') or DEFAULT_BACKOFF_SECONDS)
+    max_backoff_seconds = int(args.get('max_backoff_seconds') or DEFAULT_MAX_BACKOFF_SECONDS)
+
+    now = int(time.time())
+    pending = find_pending_requests()
+    due = [request for request in pending if int(request.get('next_attempt') or 0) <= now]
+    if not due:
+        demisto.info(f"No CrowdStrike Falcon resolve requests due ({len(pending)} pending).")
+        demisto.results(f"No CrowdStrike Falcon resolve requests due ({len(pending)} pending).")
+        return
+
+    outcomes = resolve_groups(group_requests(due), chunk_size, max_concurrency)
+    updates, rows = apply_outcomes(due, outcomes, now, max_attempts, backoff_seconds, max_backoff_seconds)
+
+    # a request whose write fails stays pending as it was, its ids are simply resolved again next run
+    unsaved = 0
+    for xsoar_id, status, request in updates:
+        try:
+            store_request(xsoar_id, status, request)
+        except ValueError as e:
+            demisto.error(str(e))
+            unsaved += 1
+
+    resolved = sum(1 for row in rows if row['Status'] == 'Resolved')
+    still_pending = sum(1 for _, status, _ in updates if status == STATUS_PENDING)
+    title = (f"CrowdStrike Falcon deferred resolution: {len(due)} request(s) drained, {resolved} id(s) resolved, "
+             f"{len(rows) - resolved} not resolved, {still_pending} request(s) still pending")
+    if unsaved:
+        title += f", {unsaved} incident(s) could not be updated"
+    demisto.results({
+        'Type': entryTypes['note'],
+        'ContentsFormat': formats['json'],
+        'Contents': rows,
+        'HumanReadable': tableToMarkdown(title, rows, headers=['XSOAR ID', 'ID', 'Type', 'Status', 'Error'])
+    })
 
 def main():
 
+    # job mode, no incident is being closed
+    if argToBoolean(demisto.args().get('drain_deferred') or False):
+        try:
+            drain_deferred_requests(demisto.args())
+        except Exception as e:
+            demisto.error(f"An error occured draining deferred CrowdStrike Falcon resolve requests: {traceback.format_exc()}")
+            return_error(f"An error occurred draining deferred CrowdStrike Falcon resolve requests: {str(e)}")
+        return
+
     # get closure & incident details
-    xsoar_id = demisto.incident.get('id')
-    source_instance = demisto.incident.get('sourceInstance')
+    snapshot = ContextSnapshot()
+    xsoar_id = snapshot.incident.get('id')
+    source_instance = snapshot.incident.get('sourceInstance')
     close_reason = demisto.args().get('closeReason')
     close_notes = demisto.args().get('closeNotes')
     resolve_alert = demisto.args().get('crowdstrikeresolvealert')
+    chunk_size = int(demisto.args().get('chunk_size') or DEFAULT_CHUNK_SIZE)
+    max_concurrency = int(demisto.args().get('max_concurrency') or DEFAULT_MAX_CONCURRENCY)
+    deferred = argToBoolean(demisto.args().get('deferred') or False)
 
     # map closure reason > crowdstrike tags
     close_code_map = {
@@ -110,13 +544,23 @@ def main():
 
     try:
         if resolve_alert == "Yes":
-            incident_id, detection_id = get_crowdstrike_ids()
-
-            if incident_id:
-                close_crowdstrike_incident(incident_id, close_code, xsoar_id, source_instance)
+            incident_ids, detection_ids = get_crowdstrike_ids(snapshot)
+            demisto.debug(snapshot.summary())
 
-            if detection_id:
-                close_crowdstrike_incident(detection_id, close_code, xsoar_id, source_instance)
+            if (incident_ids or detection_ids) and deferred:
+                enqueue_resolution(incident_ids, detection_ids, close_code, xsoar_id, source_instance)
+                demisto.results({
+                    'Type': entryTypes['note'],
+                    'ContentsFormat': formats['text'],
+                    'Contents': f"Queued {len(incident_ids)} CrowdStrike Falcon incident(s) and "
+                                f"{len(detection_ids)} detection(s) for deferred resolution."
+                })
+            elif incident_ids or detection_ids:
+                outcomes = resolve_all(incident_ids, detection_ids, close_code, xsoar_id, source_instance,
+                                       chunk_size, max_concurrency)
+                report_outcomes(outcomes)
+            else:
+                demisto.info("No CrowdStrike Falcon incident or detection IDs found on this incident.")
         
         elif resolve_alert == "No":
             demisto.info("CrowdStrike Resolve Alert is set to no. Skipping CrowdStrike post processing.")
@@ -5,26 +5,77 @@ from typing import Dict, Any
 import traceback
 import json
 import re
+import time
 
-def process_string(s):
+class ContextSnapshot:
+    """
+    Fetches the investigation context once per run and memoizes placeholder lookups.
+    Every demisto.context() call serializes the whole context across the script boundary,
+    which adds up quickly on templates with many placeholders and multi-MB context.
+
+    paths resolve exactly as demisto.get resolves them against the context (dotted keys,
+    no descending into lists), so templates render the same as before
+
+    values are shared with the cache, so treat them as read-only
+    """
+
+    def __init__(self, context=None):
+        self._context = context
+        self._values: Dict[str, Any] = {}
+        self.stats = {
+            'fetches': 0, 'fetch_seconds': 0.0,
+            'hits': 0, 'hit_seconds': 0.0,
+            'misses': 0, 'miss_seconds': 0.0
+        }
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        if self._context is None:
+            start = time.perf_counter()
+            self._context = demisto.context()
+            self.stats['fetches'] += 1
+            self.stats['fetch_seconds'] += time.perf_counter() - start
+        return self._context
+
+    def get(self, path, default=None):
+        context = self.context  # fetch outside the lookup timings, it is reported separately
+        start = time.perf_counter()
+        if path in self._values:
+            value = self._values[path]
+            self.stats['hits'] += 1
+            self.stats['hit_seconds'] += time.perf_counter() - start
+        else:
+            value = self._values[path] = demisto.get(context, path)
+            self.stats['misses'] += 1
+            self.stats['miss_seconds'] += time.perf_counter() - start
+        return default if value is None else value
+
+    def summary(self) -> str:
+        stats = self.stats
+        lookups = stats['hits'] + stats['misses']
+        return (f"context snapshot: {stats['fetches']} fetch(es) in {stats['fetch_seconds'] * 1000:.1f}ms, "
+                f"{lookups} lookup(s), {stats['hits']} hit(s) in {stats['hit_seconds'] * 1000:.2f}ms, "
+                f"{stats['misses']} miss(es) in {stats['miss_seconds'] * 1000:.2f}ms")
+
+def process_string(s, snapshot):
     pattern = r'\$\{(.*?)\}'
     matches = re.findall(pattern, s)
     for match in matches:
-        # Retrieve the value from the context using the placeholder
-        context_value = demisto.get(demisto.context(), match)
+        # Retrieve the value from the context snapshot using the placeholder
+        context_value = snapshot.get(match)
         if context_value is None:
             context_value = ''
         # Replace the placeholder with the actual value
         s = s.replace('${' + match + '}', str(context_value))
     return s
 
-def process_json(obj):
+def process_json(obj, snapshot):
     if isinstance(obj, dict):
-        return {k: process_json(v) for k, v in obj.items()}
+        return {k: process_json(v, snapshot) for k, v in obj.items()}
     elif isinstance(obj, list):
-        return [process_json(elem) for elem in obj]
+        return [process_json(elem, snapshot) for elem in obj]
     elif isinstance(obj, str):
-        return process_string(obj)
+        return process_string(obj, snapshot)
     else:
         return obj
 
@@ -34,8 +85,10 @@ def main():
         input_json_str = demisto.args().get('json_object')
         input_json = json.loads(input_json_str)
 
-        # process data
-        output_json = process_json(input_json)
+        # process data - one context fetch for every placeholder in the template
+        snapshot = ContextSnapshot()
+        output_json = process_json(input_json, snapshot)
+        demisto.debug(snapshot.summary())
 
         # return in json format
         demisto.results({
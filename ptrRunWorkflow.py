@@ -10,7 +10,10 @@ pre-reqs:
 
 steps:
 1. establishes an authenticated session (i created a service account in trap for this)
+   - the logged in cookie jar is cached encrypted between runs and reused until trap rejects it
 2. loads the 'run custom workflow' form
+   - the form's static structure (action, field names, defaults) is cached; on a cache hit only the
+     per-request tokens (csrf etc.) are pulled out of the page with a targeted regex, no full html parse
 3. submits the form with the default values
 
 args:
@@ -19,20 +22,269 @@ args:
 - "password": for the trap user
 - "workflow_id": ID for the custom workflow to run
 - "trap_inc_id": ID for the trap incident 
+- "use_session_cache": reuse the logged in session between runs (default true)
+- "session_cache_dir": directory for the encrypted session file (default: system temp dir)
+- "session_cache_list": xsoar list to keep the encrypted session in instead, so it survives container restarts
+- "session_max_age_hours": a cached session unused for longer than this is discarded without being tried (default 8)
+- "use_form_cache": reuse the parsed form structure between runs (default true)
+- "form_cache_ttl_hours": how long a parsed form structure is trusted (default 24)
+
+session cache notes:
+- cookies are encrypted with fernet (needs the `cryptography` package); the key is derived from the
+  base url, username and password, so a password change just misses the cache
+- without `cryptography` the cache is disabled rather than storing cookies in plain text
+
+form cache notes:
+- stored as json next to the session cache (`session_cache_dir`), readable only by the script's user;
+  token field values (csrf and the like) are blanked before saving and read fresh from the page each run
+- a cached structure is dropped when the page's form action no longer matches, when a token field
+  is missing from the page, or when a submission using it fails
 
 note: there are security considerations that need to be evaluated for each scenario, use at your own risk.
 
 """
 
+import base64
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from html import unescape
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
 import requests
 from bs4 import BeautifulSoup
 
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None
+
+DEFAULT_SESSION_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'ptr_session_cache')
+DEFAULT_SESSION_MAX_AGE_HOURS = 8
+# pbkdf2 rounds for the cache key; a few tens of ms per run, far below a login round trip
+KEY_DERIVATION_ROUNDS = 100_000
+
+FORM_PATH = "/forms/myForm"
+FORM_NAME = "new_custom_workflow_execution"
+DEFAULT_FORM_CACHE_TTL_HOURS = 24
+# hidden inputs minted per page load; every other input in the form is treated as static
+TOKEN_FIELD = re.compile(r'csrf|token|nonce', re.I)
+
+_FORM_OPEN_TAG = re.compile(r'<form\b([^>]*)>', re.I)
+_FORM_CLOSE_TAG = re.compile(r'</form\s*>', re.I)
+_INPUT_TAG = re.compile(r'<input\b([^>]*)>', re.I)
+_TAG_ATTRIBUTE = re.compile(r'''([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?''')
+
+
+class SessionCache:
+    """
+    Encrypted store for an authenticated trap cookie jar so runs can skip the login.
+    Kept in a file under `directory`, or in an xsoar list when `list_name` is given.
+    """
+
+    def __init__(self, base_url, username, password, directory=None, list_name=None,
+                 max_age_hours=DEFAULT_SESSION_MAX_AGE_HOURS):
+        identity = f"{base_url}|{username}".encode()
+        key = hashlib.pbkdf2_hmac('sha256', password.encode(), identity, KEY_DERIVATION_ROUNDS)
+        self._fernet = Fernet(base64.urlsafe_b64encode(key))
+        self.slot = hashlib.sha256(identity).hexdigest()[:32]
+        self.directory = directory or DEFAULT_SESSION_CACHE_DIR
+        self.list_name = list_name
+        self.max_age = int(float(max_age_hours) * 3600)
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f"ptr-session-{self.slot}")
+
+    def load(self) -> Optional[requests.Session]:
+        """A session carrying the cached cookies, or None when there is nothing usable"""
+        token = self._read()
+        if not token:
+            return None
+        try:
+            # fernet tokens carry their creation time, ttl enforces the max age
+            cookies = json.loads(self._fernet.decrypt(token.encode(), ttl=self.max_age))
+        except (InvalidToken, ValueError):
+            self.clear()
+            return None
+
+        session = new_session()
+        for cookie in cookies:
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'],
+                                expires=cookie['expires'], secure=cookie['secure'])
+        session.cookies.clear_expired_cookies()
+        if not len(session.cookies):
+            self.clear()
+            return None
+        return session
+
+    def save(self, session):
+        cookies = [
+            {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path,
+             'expires': cookie.expires, 'secure': cookie.secure}
+            for cookie in session.cookies
+        ]
+        self._write(self._fernet.encrypt(json.dumps(cookies).encode()).decode())
+
+    def clear(self):
+        self._write('')
+
+    def _read(self):
+        if self.list_name:
+            response = demisto.executeCommand("getList", {"listName": self.list_name})
+            if is_error(response[0]):
+                return None
+            return (response[0].get('Contents') or '').strip()
+        try:
+            with open(self.path) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _write(self, token):
+        if self.list_name:
+            response = demisto.executeCommand("setList", {"listName": self.list_name, "listData": token})
+            if is_error(response[0]) and token:
+                demisto.executeCommand("createList", {"listName": self.list_name, "listData": token})
+            return
+        if not token:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(token)
+        os.replace(temp_path, self.path)
+
+
+class FormSchemaCache:
+    """
+    Disk cache for the parsed workflow form: absolute action url, static field defaults and
+    the names of the per-request token fields. Token values are never written, only their names.
+    Entries older than `ttl_hours` are ignored.
+    """
+
+    def __init__(self, base_url, directory=None, ttl_hours=DEFAULT_FORM_CACHE_TTL_HOURS):
+        self.slot = hashlib.sha256(f"{base_url}|{FORM_PATH}|{FORM_NAME}".encode()).hexdigest()[:32]
+        self.directory = directory or DEFAULT_SESSION_CACHE_DIR
+        self.ttl = float(ttl_hours) * 3600
 
-def submit_form(base_url, username, password, inc_id, workflow_id):
+    @property
+    def path(self):
+        return os.path.join(self.directory, f"ptr-form-{self.slot}.json")
 
-    # create a session
+    def load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path) as f:
+                schema = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - schema.get('cached_at', 0) > self.ttl:
+            return None
+        return schema
+
+    def save(self, schema):
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        token_fields = set(schema['token_fields'])
+        fields = {name: '' if name in token_fields else value for name, value in schema['fields'].items()}
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(dict(schema, fields=fields, cached_at=time.time()), f)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def tag_attributes(attribute_text) -> Dict[str, str]:
+    attributes = {}
+    for name, double_quoted, single_quoted, bare in _TAG_ATTRIBUTE.findall(attribute_text):
+        attributes.setdefault(name.lower(), unescape(double_quoted or single_quoted or bare))
+    return attributes
+
+
+def find_form(page_html, form_name) -> Optional[Tuple[Dict[str, str], str]]:
+    """Attributes and inner html of the named form, found by scanning tags rather than building a tree"""
+    for match in _FORM_OPEN_TAG.finditer(page_html):
+        attributes = tag_attributes(match.group(1))
+        if attributes.get('name') == form_name:
+            close = _FORM_CLOSE_TAG.search(page_html, match.end())
+            return attributes, page_html[match.end():close.start() if close else len(page_html)]
+    return None
+
+
+def form_action_url(action, form_page_url):
+    if not action.startswith("http"):
+        # build the absolute URL if it's a relative action
+        # (this might just be `f"{base_url}/{action}"` depending on how your site is structured)
+        action = requests.compat.urljoin(form_page_url, action)
+    return action
+
+
+def parse_form_schema(page_html, form_page_url) -> Dict[str, Any]:
+    """Full parse of the workflow form; the slow path, taken when there is no usable cached schema"""
+    soup = BeautifulSoup(page_html, "html.parser")
+    form = soup.find("form", {"name": FORM_NAME})
+    if not form:
+        raise ValueError(f"Could not find form '{FORM_NAME}' on the page.")
+
+    # collect default form inputs (including hidden fields)
+    fields = {}
+    token_fields = []
+    for input_tag in form.find_all("input"):
+        name = input_tag.get("name")
+        value = input_tag.get("value", "")
+        # populate the dictionary
+        if name:
+            fields[name] = value
+            if input_tag.get("type", "").lower() == "hidden" and TOKEN_FIELD.search(name):
+                token_fields.append(name)
+
+    return {
+        'action': form_action_url(form.get("action") or "", form_page_url),
+        'fields': fields,
+        'token_fields': token_fields
+    }
+
+
+def extract_tokens(page_html, form_page_url, schema) -> Optional[Dict[str, str]]:
+    """
+    Fast path for a cached schema: confirm the form still posts to the same action and pull
+    out just the token field values. None means the page no longer matches the schema.
+    """
+    found = find_form(page_html, FORM_NAME)
+    if not found or form_action_url(found[0].get('action', ''), form_page_url) != schema['action']:
+        return None
+
+    wanted = set(schema['token_fields'])
+    tokens = {}
+    for match in _INPUT_TAG.finditer(found[1]):
+        attributes = tag_attributes(match.group(1))
+        if attributes.get('name') in wanted:
+            tokens[attributes['name']] = attributes.get('value', '')
+    return tokens if len(tokens) == len(wanted) else None
+
+
+def is_error(result):
+    return result['Type'] == entryTypes['error']
+
+
+def new_session():
     session = requests.Session()
     session.verify = False  # not recommended for production, but can be used if needed
+    return session
+
+
+def login(base_url, username, password):
+    session = new_session()
 
     # authentication step
     login_endpoint = f"{base_url}/login"
@@ -46,48 +298,94 @@ def submit_form(base_url, username, password, inc_id, workflow_id):
     # check if login was successful
     if response.status_code != 200:
         raise ValueError(f"Login failed with status code {response.status_code}.")
+    return session
+
+
+def session_rejected(response):
+    """trap answers an expired session with 401/403 or by redirecting to the login page"""
+    return response.status_code in (401, 403) or urlparse(response.url).path.rstrip('/').endswith('/login')
+
+
+def submit_form(base_url, username, password, inc_id, workflow_id, session_cache=None, form_cache=None):
+
+    # reuse the cached session when there is one, only logging in when trap turns it away
+    session = session_cache.load() if session_cache else None
+    from_cache = session is not None
+    if session is None:
+        session = login(base_url, username, password)
 
     # retrieve the form page
-    form_page_url = f"{base_url}/forms/myForm"
+    form_page_url = f"{base_url}{FORM_PATH}"
     form_page = session.get(form_page_url)
+    if from_cache and session_rejected(form_page):
+        demisto.debug("Cached TRAP session was rejected, logging in again.")
+        session_cache.clear()
+        session = login(base_url, username, password)
+        form_page = session.get(form_page_url)
     if form_page.status_code != 200:
         raise ValueError(f"Form page retrieval failed with status code {form_page.status_code}.")
 
-    # parse the form to retrieve default form fields (if you need hidden values, tokens, etc.)
-    soup = BeautifulSoup(form_page.text, "html.parser")
-    form = soup.find("form", {"name": "new_custom_workflow_execution"})
-    if not form:
-        raise ValueError("Could not find form 'new_custom_workflow_execution' on the page.")
+    # use the cached form structure when the page still matches it, refreshing only the tokens
+    schema = form_cache.load() if form_cache else None
+    tokens = extract_tokens(form_page.text, form_page_url, schema) if schema else None
+    schema_from_cache = tokens is not None
+    if not schema_from_cache:
+        schema = parse_form_schema(form_page.text, form_page_url)
+        tokens = {}
+        if form_cache:
+            form_cache.save(schema)
 
-    # collect default form inputs (including hidden fields)
-    form_data = {}
-    for input_tag in form.find_all("input"):
-        name = input_tag.get("name")
-        value = input_tag.get("value", "")
-        # populate the dictionary
-        if name:
-            form_data[name] = value
+    form_data = dict(schema['fields'], **tokens)
 
     # form_data['inc_id'] = inc_id
     # form_data['workflow_id'] = workflow_id
 
     # submit the form
-    action = form.get("action")
-    if not action.startswith("http"):
-        # build the absolute URL if it's a relative action
-        # (this might just be `f"{base_url}/{action}"` depending on how your site is structured)
-        action = requests.compat.urljoin(form_page_url, action)
+    action = schema['action']
 
     # now POST the form data
     submit_response = session.post(action, data=form_data)
     if submit_response.status_code not in [200, 302]:
+        if session_cache and session_rejected(submit_response):
+            session_cache.clear()
+        elif schema_from_cache:
+            # the form may have changed under the cached structure, parse it fresh next run
+            form_cache.clear()
         raise ValueError(
             f"Form submission failed with status code {submit_response.status_code}."
         )
 
+    if session_cache:
+        # trap may have rotated or extended the cookies during the run, store the latest jar
+        session_cache.save(session)
+
     return "Form submitted successfully."
 
 
+def form_cache_from_args(args, base_url):
+    if not argToBoolean(args.get('use_form_cache', True)):
+        return None
+    return FormSchemaCache(
+        base_url,
+        directory=args.get('session_cache_dir'),
+        ttl_hours=args.get('form_cache_ttl_hours') or DEFAULT_FORM_CACHE_TTL_HOURS
+    )
+
+
+def session_cache_from_args(args, base_url, username, password):
+    if not argToBoolean(args.get('use_session_cache', True)):
+        return None
+    if Fernet is None:
+        demisto.debug("cryptography is not installed, TRAP session cache disabled.")
+        return None
+    return SessionCache(
+        base_url, username, password,
+        directory=args.get('session_cache_dir'),
+        list_name=args.get('session_cache_list'),
+        max_age_hours=args.get('session_max_age_hours') or DEFAULT_SESSION_MAX_AGE_HOURS
+    )
+
+
 def main():
 
     # get conn/auth parameters
@@ -105,7 +403,9 @@ def main():
             username=username,
             password=password,
             inc_id=inc_id,
-            workflow_id=workflow_id
+            workflow_id=workflow_id,
+            session_cache=session_cache_from_args(demisto.args(), base_url, username, password),
+            form_cache=form_cache_from_args(demisto.args(), base_url)
         )
 
         return_results(result_message)
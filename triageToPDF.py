@@ -1,19 +1,425 @@
+import hashlib
+import io
 import json
-import tempfile
 import os
+import pickle
+import re
+import tempfile
+from dataclasses import dataclass, field
+from html import escape as html_escape
+from xml.sax.saxutils import escape
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.enums import TA_LEFT, TA_CENTER
 
 # xsoar imports
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 import traceback
 
-def generate_pdf_report(data, output_file):
-    doc = SimpleDocTemplate(
+# upper bound on render processes in batch mode; each one holds a full flowable tree
+MAX_BATCH_WORKERS = 4
+
+# bump when the report layout changes so cached PDFs from older code are not served
+RENDER_VERSION = 3
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'triage_pdf_cache')
+DEFAULT_CACHE_MAX_MB = 200
+
+# compact lays signatures out as one score-sorted table per target, listing
+# signatures seen on several targets once in a cross-reference section;
+# max_signatures caps each table (0 for no cap)
+DEFAULT_LAYOUT = {'compact': False, 'max_signatures': 25}
+
+
+def _layout(layout=None) -> Dict[str, Any]:
+    return dict(DEFAULT_LAYOUT, **(layout or {}))
+
+
+def _build_styles():
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Heading1Center', parent=styles['Heading1'], alignment=TA_CENTER))
+    styles.add(ParagraphStyle(name='Heading2Bold', parent=styles['Heading2'], textColor=colors.darkblue))
+    styles.add(ParagraphStyle(name='BodyTextIndented', parent=styles['BodyText'], leftIndent=10))
+    styles.add(ParagraphStyle(name='TableCell', parent=styles['BodyText'], fontSize=8, leading=10))
+    return styles
+
+
+# styles are read-only during a build, so one copy serves every report
+REPORT_STYLES = _build_styles()
+
+METADATA_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+    ('BOX', (0,0), (-1,-1), 0.25, colors.black),
+    ('INNERGRID', (0,0), (-1,-1), 0.25, colors.black),
+    ('VALIGN', (0,0), (-1,-1), 'TOP'),
+])
+
+TARGET_TABLE_STYLE = TableStyle([
+    ('BOX', (0,0), (-1,-1), 0.25, colors.black),
+    ('INNERGRID', (0,0), (-1,-1), 0.25, colors.black),
+])
+
+SIGNATURE_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+    ('BOX', (0,0), (-1,-1), 0.25, colors.black),
+    ('INNERGRID', (0,0), (-1,-1), 0.25, colors.black),
+    ('VALIGN', (0,0), (-1,-1), 'TOP'),
+    ('FONTSIZE', (0,0), (-1,-1), 8),
+])
+
+
+class RenderCache:
+    """
+    Content-addressed store of rendered PDFs on local disk.
+    Entries are named <sample sha256>-<hash of the input JSON>; file mtime
+    tracks last use and the least recently used files are evicted once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def _variant(layout) -> str:
+        return f"{RENDER_VERSION}:{json.dumps(_layout(layout), sort_keys=True)}:"
+
+    @staticmethod
+    def key(data, layout=None) -> str:
+        sample_sha256 = str((data.get('sample') or {}).get('sha256') or 'nosha256')
+        canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+        content_hash = hashlib.sha256(f"{RenderCache._variant(layout)}{canonical}".encode('utf-8')).hexdigest()[:32]
+        return f"{sample_sha256}-{content_hash}"
+
+    @staticmethod
+    def file_key(path, layout=None) -> str:
+        # hashes the raw file so large entries are never parsed in full just to look them up
+        sample_sha256 = str(read_report_sample(path).get('sha256') or 'nosha256')
+        digest = hashlib.sha256(RenderCache._variant(layout).encode('utf-8'))
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return f"{sample_sha256}-{digest.hexdigest()[:32]}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                pdf = f.read()
+            os.utime(path)  # mark as recently used
+            return pdf
+        except OSError:
+            return None
+
+    def put(self, key: str, pdf: bytes):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # write then rename so concurrent readers never see a partial file
+            tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(pdf)
+            os.replace(tmp_path, self._path(key))
+            self._evict()
+        except OSError as e:
+            demisto.debug(f"Could not write triage report cache entry {key}: {e}")
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pdf'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue  # removed by another process
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+
+def render_report(data, cache: Optional[RenderCache] = None, layout=None) -> bytes:
+    """PDF bytes for data, served from the render cache when an identical report was built before"""
+    if cache is None:
+        return generate_pdf_report(data, layout=layout)
+
+    key = cache.key(data, layout)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = generate_pdf_report(data, layout=layout)
+        cache.put(key, pdf)
+    return pdf
+
+
+def render_report_file(path, cache: Optional[RenderCache] = None, layout=None) -> bytes:
+    """Streaming counterpart of render_report for triage JSON on disk"""
+    if cache is None:
+        return generate_pdf_report_from_file(path, layout=layout)
+
+    key = cache.file_key(path, layout)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = generate_pdf_report_from_file(path, layout=layout)
+        cache.put(key, pdf)
+    return pdf
+
+
+# renderer-agnostic report model
+
+@dataclass
+class SignatureInfo:
+    name: Any = 'Unknown'
+    desc: Any = 'No description.'
+    score: Any = 'N/A'
+    tags: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, sig) -> 'SignatureInfo':
+        return cls(
+            name=sig.get('name', 'Unknown'),
+            desc=sig.get('desc', 'No description.'),
+            score=sig.get('score', 'N/A'),
+            tags=list(sig.get('tags') or [])
+        )
+
+
+@dataclass
+class TargetInfo:
+    index: int
+    name: Any = 'N/A'
+    score: Any = 'N/A'
+    size: Any = 'N/A'
+    md5: Any = 'N/A'
+    sha1: Any = 'N/A'
+    sha256: Any = 'N/A'
+    tags: List[str] = field(default_factory=list)
+    family: List[str] = field(default_factory=list)
+    signatures: List[SignatureInfo] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, index, t) -> 'TargetInfo':
+        return cls(
+            index=index,
+            name=t.get('target', 'N/A'),
+            score=t.get('score', 'N/A'),
+            size=t.get('size', 'N/A'),
+            md5=t.get('md5', 'N/A'),
+            sha1=t.get('sha1', 'N/A'),
+            sha256=t.get('sha256', 'N/A'),
+            tags=list(t.get('tags') or []),
+            family=list(t.get('family') or []),
+            signatures=[SignatureInfo.from_dict(sig) for sig in t.get('signatures') or []]
+        )
+
+
+@dataclass
+class ExtractedConfig:
+    dumped_file: Any = 'N/A'
+    resource: Any = 'N/A'
+    family: Any = 'N/A'
+    version: Any = 'N/A'
+    botnet: Any = 'N/A'
+    c2: List[str] = field(default_factory=list)
+    keys: List[Tuple[Any, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, item) -> 'ExtractedConfig':
+        config = item.get('config') or {}
+        return cls(
+            dumped_file=item.get('dumped_file', 'N/A'),
+            resource=item.get('resource', 'N/A'),
+            family=config.get('family', 'N/A'),
+            version=config.get('version', 'N/A'),
+            botnet=config.get('botnet', 'N/A'),
+            c2=list(config.get('c2') or []),
+            keys=[(key.get('kind', 'N/A'), key.get('value', 'N/A')) for key in config.get('keys') or []]
+        )
+
+
+@dataclass
+class SampleInfo:
+    id: Any = 'N/A'
+    target: Any = 'N/A'
+    score: Any = 'N/A'
+    md5: Any = 'N/A'
+    sha1: Any = 'N/A'
+    sha256: Any = 'N/A'
+    sha512: Any = 'N/A'
+    size: Any = 'N/A'
+
+    @classmethod
+    def from_dicts(cls, sample, analysis) -> 'SampleInfo':
+        """The overall score lives under analysis, everything else under sample"""
+        return cls(
+            id=sample.get('id', 'N/A'),
+            target=sample.get('target', 'N/A'),
+            score=analysis.get('score', 'N/A'),
+            md5=sample.get('md5', 'N/A'),
+            sha1=sample.get('sha1', 'N/A'),
+            sha256=sample.get('sha256', 'N/A'),
+            sha512=sample.get('sha512', 'N/A'),
+            size=sample.get('size', 'N/A')
+        )
+
+
+@dataclass
+class TriageReport:
+    sample: SampleInfo
+    targets: List[TargetInfo] = field(default_factory=list)
+    extracted: List[ExtractedConfig] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data) -> 'TriageReport':
+        return cls(
+            sample=SampleInfo.from_dicts(data.get('sample') or {}, data.get('analysis') or {}),
+            targets=[TargetInfo.from_dict(idx, t) for idx, t in enumerate(data.get('targets') or [], start=1)],
+            extracted=[ExtractedConfig.from_dict(item) for item in data.get('extracted') or []]
+        )
+
+    @classmethod
+    def from_file(cls, path) -> 'TriageReport':
+        """Build the model from a file, skipping sections the report never shows"""
+        sample, analysis, targets, extracted = {}, {}, [], []
+        with open(path, 'r') as f:
+            for key, value in iter_report_sections(f):
+                if value is SECTION_END:
+                    continue
+                if key == 'sample':
+                    sample = value or {}
+                elif key == 'analysis':
+                    analysis = value or {}
+                elif key == 'targets':
+                    targets.append(TargetInfo.from_dict(len(targets) + 1, value))
+                elif key == 'extracted':
+                    extracted.append(ExtractedConfig.from_dict(value))
+        return cls(SampleInfo.from_dicts(sample, analysis), targets, extracted)
+
+
+def _sample_rows(sample: SampleInfo):
+    return [
+        ['MD5', sample.md5],
+        ['SHA1', sample.sha1],
+        ['SHA256', sample.sha256],
+        ['SHA512', sample.sha512],
+        ['Size (bytes)', str(sample.size)]
+    ]
+
+
+def _target_rows(target: TargetInfo):
+    return [
+        ['Target Name', target.name],
+        ['Score', str(target.score)],
+        ['Size', str(target.size)],
+        ['MD5', target.md5],
+        ['SHA1', target.sha1],
+        ['SHA256', target.sha256]
+    ]
+
+
+def _extracted_rows(item: ExtractedConfig):
+    return [
+        ['Resource', item.resource],
+        ['Family', item.family],
+        ['Version', item.version],
+        ['Botnet', item.botnet],
+        ['C2 Servers', ", ".join(str(c2) for c2 in item.c2)],
+        ['Keys', "; ".join(f"{kind}: {value}" for kind, value in item.keys)]
+    ]
+
+
+def _signature_score(sig: SignatureInfo) -> float:
+    try:
+        return float(sig.score)
+    except (TypeError, ValueError):
+        return -1.0
+
+
+class SharedSignatures:
+    """
+    Signatures that fire on more than one target.
+    Built from a first pass over the targets that keeps only names and target
+    numbers; the highest scoring variant of each is recorded while targets render.
+    """
+
+    def __init__(self, targets):
+        seen: Dict[str, List[int]] = {}
+        for t in targets:
+            for name in {sig.name for sig in t.signatures}:
+                seen.setdefault(name, []).append(t.index)
+        self.targets = {name: idxs for name, idxs in seen.items() if len(idxs) > 1}
+        self.signatures: Dict[str, SignatureInfo] = {}
+
+    def __contains__(self, name):
+        return name in self.targets
+
+    def observe(self, sig: SignatureInfo):
+        current = self.signatures.get(sig.name)
+        if current is None or _signature_score(sig) > _signature_score(current):
+            self.signatures[sig.name] = sig
+
+    def target_refs(self, name) -> List[str]:
+        return [f"#{idx}" for idx in self.targets[name]]
+
+
+def _rank_signatures(signatures, max_rows):
+    ranked = sorted(signatures, key=_signature_score, reverse=True)
+    shown = ranked[:max_rows] if max_rows else ranked
+    return shown, ranked[len(shown):]
+
+
+def select_signatures(signatures, layout, shared: Optional[SharedSignatures] = None):
+    """
+    Decide which of a target's signatures a renderer lists.
+    Returns (shown, omitted, shared_names). The default layout shows all of them in
+    report order; compact moves shared ones to the cross-reference section and ranks
+    the rest by score, capped at max_signatures.
+    """
+    if not layout['compact']:
+        return signatures, [], []
+
+    own, common = [], {}
+    for sig in signatures:
+        if shared is not None and sig.name in shared:
+            shared.observe(sig)
+            common[sig.name] = True
+        else:
+            own.append(sig)
+    shown, omitted = _rank_signatures(own, layout['max_signatures'])
+    return shown, omitted, list(common)
+
+
+SHARED_SIGNATURES_TITLE = "Signatures Seen on Multiple Targets"
+
+
+def _omitted_note(shown, omitted) -> str:
+    return (f"Top {len(shown)} of {len(shown) + len(omitted)} signatures by score; {len(omitted)} scoring "
+            f"{omitted[0].score} or lower not shown.")
+
+
+def _shared_note(names) -> str:
+    return (f"Also matched {len(names)} signatures shared with other targets "
+            f"(see {SHARED_SIGNATURES_TITLE}): " + ", ".join(str(name) for name in names))
+
+
+# PDF backend
+
+def _new_document(output_file):
+    return SimpleDocTemplate(
         output_file,
         pagesize=A4,
         rightMargin=20*mm,
@@ -22,171 +428,718 @@ def generate_pdf_report(data, output_file):
         bottomMargin=20*mm
     )
 
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Heading1Center', parent=styles['Heading1'], alignment=TA_CENTER))
-    styles.add(ParagraphStyle(name='Heading2Bold', parent=styles['Heading2'], textColor=colors.darkblue))
-    styles.add(ParagraphStyle(name='BodyTextIndented', parent=styles['BodyText'], leftIndent=10))
 
+def _summary_flowables(sample: SampleInfo):
+    styles = REPORT_STYLES
     elements = []
 
-    # extract main sections
-    sample = data.get('sample', {})
-    analysis = data.get('analysis', {})
-    targets = data.get('targets', [])
-    extracted = data.get('extracted', [])
-
     # title page
     elements.append(Paragraph("Hatching Triage Sandbox Report", styles['Heading1Center']))
     elements.append(Spacer(1, 12))
-    elements.append(Paragraph(f"Sample ID: {sample.get('id', 'N/A')}", styles['Normal']))
-    elements.append(Paragraph(f"Target File: {sample.get('target', 'N/A')}", styles['Normal']))
-    elements.append(Paragraph(f"Overall Score: {analysis.get('score', 'N/A')}", styles['Normal']))
+    elements.append(Paragraph(f"Sample ID: {sample.id}", styles['Normal']))
+    elements.append(Paragraph(f"Target File: {sample.target}", styles['Normal']))
+    elements.append(Paragraph(f"Overall Score: {sample.score}", styles['Normal']))
     elements.append(Spacer(1, 24))
 
     # sample metadata
     elements.append(Paragraph("Sample Metadata", styles['Heading2Bold']))
     elements.append(Spacer(1, 6))
-    metadata_table_data = [
-        ['MD5', sample.get('md5', 'N/A')],
-        ['SHA1', sample.get('sha1', 'N/A')],
-        ['SHA256', sample.get('sha256', 'N/A')],
-        ['SHA512', sample.get('sha512', 'N/A')],
-        ['Size (bytes)', str(sample.get('size', 'N/A'))]
-    ]
-    metadata_table = Table(metadata_table_data, colWidths=[70*mm, 100*mm])
-    metadata_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('BOX', (0,0), (-1,-1), 0.25, colors.black),
-        ('INNERGRID', (0,0), (-1,-1), 0.25, colors.black),
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-    ]))
+    metadata_table = Table(_sample_rows(sample), colWidths=[70*mm, 100*mm])
+    metadata_table.setStyle(METADATA_TABLE_STYLE)
     elements.append(metadata_table)
     elements.append(Spacer(1, 12))
+    return elements
 
-    # targets
-    for idx, t in enumerate(targets, start=1):
-        elements.append(Paragraph(f"Target #{idx}", styles['Heading2Bold']))
-        elements.append(Spacer(1, 6))
 
-        target_table_data = [
-            ['Target Name', t.get('target', 'N/A')],
-            ['Score', str(t.get('score', 'N/A'))],
-            ['Size', str(t.get('size', 'N/A'))],
-            ['MD5', t.get('md5', 'N/A')],
-            ['SHA1', t.get('sha1', 'N/A')],
-            ['SHA256', t.get('sha256', 'N/A')]
-        ]
-        target_table = Table(target_table_data, colWidths=[70*mm, 100*mm])
-        target_table.setStyle(TableStyle([
-            ('BOX', (0,0), (-1,-1), 0.25, colors.black),
-            ('INNERGRID', (0,0), (-1,-1), 0.25, colors.black),
-        ]))
-        elements.append(target_table)
+def _target_flowables(target: TargetInfo, layout=None, shared=None):
+    layout = _layout(layout)
+    styles = REPORT_STYLES
+    elements = []
+    elements.append(Paragraph(f"Target #{target.index}", styles['Heading2Bold']))
+    elements.append(Spacer(1, 6))
+
+    target_table = Table(_target_rows(target), colWidths=[70*mm, 100*mm])
+    target_table.setStyle(TARGET_TABLE_STYLE)
+    elements.append(target_table)
+    elements.append(Spacer(1, 12))
+
+    # tags
+    if target.tags:
+        elements.append(Paragraph("Tags:", styles['BodyText']))
+        elements.append(Paragraph(", ".join(target.tags), styles['BodyTextIndented']))
         elements.append(Spacer(1, 12))
 
-        # tags
-        tags = t.get('tags', [])
-        if tags:
-            elements.append(Paragraph("Tags:", styles['BodyText']))
-            elements.append(Paragraph(", ".join(tags), styles['BodyTextIndented']))
-            elements.append(Spacer(1, 12))
+    # family
+    if target.family:
+        elements.append(Paragraph("Family:", styles['BodyText']))
+        elements.append(Paragraph(", ".join(target.family), styles['BodyTextIndented']))
+        elements.append(Spacer(1, 12))
 
-        # family
-        family = t.get('family', [])
-        if family:
-            elements.append(Paragraph("Family:", styles['BodyText']))
-            elements.append(Paragraph(", ".join(family), styles['BodyTextIndented']))
+    # signatures
+    if target.signatures and layout['compact']:
+        elements.extend(_compact_signature_flowables(target.signatures, layout, shared))
+        elements.append(Spacer(1, 18))
+        return elements
+    if target.signatures:
+        elements.append(Paragraph("Signatures:", styles['Heading2Bold']))
+        elements.append(Spacer(1, 6))
+        for sig in target.signatures:
+            elements.append(Paragraph(f"Signature: {sig.name} (Score: {sig.score})", styles['BodyText']))
+            elements.append(Paragraph(f"Description: {sig.desc}", styles['BodyTextIndented']))
+            if sig.tags:
+                elements.append(Paragraph("Tags: " + ", ".join(sig.tags), styles['BodyTextIndented']))
             elements.append(Spacer(1, 12))
 
-        # signatures
-        signatures = t.get('signatures', [])
-        if signatures:
-            elements.append(Paragraph("Signatures:", styles['Heading2Bold']))
-            elements.append(Spacer(1, 6))
-            for sig in signatures:
-                sig_name = sig.get('name', 'Unknown')
-                sig_desc = sig.get('desc', 'No description.')
-                sig_score = sig.get('score', 'N/A')
-                sig_tags = sig.get('tags', [])
-
-                elements.append(Paragraph(f"Signature: {sig_name} (Score: {sig_score})", styles['BodyText']))
-                elements.append(Paragraph(f"Description: {sig_desc}", styles['BodyTextIndented']))
-                if sig_tags:
-                    elements.append(Paragraph("Tags: " + ", ".join(sig_tags), styles['BodyTextIndented']))
-                elements.append(Spacer(1, 12))
-
-        elements.append(PageBreak())
+    elements.append(PageBreak())
+    return elements
 
-    # extracted configs / payloads
-    if extracted:
-        elements.append(Paragraph("Extracted Artifacts & Configurations", styles['Heading2Bold']))
-        elements.append(Spacer(1, 12))
 
-        for item in extracted:
-            tasks = item.get('tasks', [])
-            dumped_file = item.get('dumped_file', 'N/A')
-            resource = item.get('resource', 'N/A')
-            config = item.get('config', {})
-            family = config.get('family', 'N/A')
-            c2_servers = config.get('c2', [])
-            version = config.get('version', 'N/A')
-            botnet = config.get('botnet', 'N/A')
-            keys = config.get('keys', [])
-
-            elements.append(Paragraph(f"Dumped File: {dumped_file}", styles['BodyText']))
-            elements.append(Paragraph(f"Resource: {resource}", styles['BodyTextIndented']))
-            elements.append(Paragraph(f"Family: {family}", styles['BodyTextIndented']))
-            elements.append(Paragraph(f"Version: {version}", styles['BodyTextIndented']))
-            elements.append(Paragraph(f"Botnet: {botnet}", styles['BodyTextIndented']))
-
-            if c2_servers:
-                elements.append(Paragraph("C2 Servers:", styles['BodyText']))
-                for c2 in c2_servers:
-                    elements.append(Paragraph(c2, styles['BodyTextIndented']))
-
-            if keys:
-                elements.append(Paragraph("Keys:", styles['BodyText']))
-                for keyobj in keys:
-                    elements.append(Paragraph(f"Type: {keyobj.get('kind', 'N/A')} | Key: {keyobj.get('value', 'N/A')}", styles['BodyTextIndented']))
+def _fit_cell(text, width, font='Helvetica', size=8):
+    """Shorten text with an ellipsis so it fits on one line of a table cell"""
+    text = " ".join(text.split())
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(text + '...', font, size) > width:
+        text = text[:-1]
+    return text + '...'
+
+
+def _signature_table(shown, omitted, shared=None):
+    """Signature table in the given order; shared adds a column with the targets each one fired on"""
+    styles = REPORT_STYLES
+    col_widths = [12*mm, 55*mm, 78*mm, 25*mm] if shared else [12*mm, 55*mm, 103*mm]
+    name_width = col_widths[1] - 6  # less the default cell padding
+
+    rows = [['Score', 'Signature', 'Description', 'Targets'] if shared else ['Score', 'Signature', 'Description']]
+    for sig in shown:
+        # plain-string cells cost nothing to lay out; only the description wraps,
+        # and keeping it to one font keeps reportlab on its fast line-breaking path
+        text = escape(str(sig.desc))
+        if sig.tags:
+            text += escape(f" [{', '.join(sig.tags)}]")
+        row = [str(sig.score), _fit_cell(str(sig.name), name_width), Paragraph(text, styles['TableCell'])]
+        if shared:
+            refs = shared.target_refs(sig.name)
+            row.append("\n".join(", ".join(refs[i:i + 4]) for i in range(0, len(refs), 4)))
+        rows.append(row)
+
+    table = Table(rows, colWidths=col_widths, repeatRows=1)
+    table.setStyle(SIGNATURE_TABLE_STYLE)
+    elements = [table]
+
+    if omitted:
+        elements.append(Spacer(1, 4))
+        elements.append(Paragraph(escape(_omitted_note(shown, omitted)), styles['BodyTextIndented']))
+    return elements
+
+
+def _compact_signature_flowables(signatures, layout, shared=None):
+    styles = REPORT_STYLES
+    shown, omitted, common = select_signatures(signatures, layout, shared)
+
+    elements = [Paragraph("Signatures:", styles['Heading2Bold']), Spacer(1, 6)]
+    if shown:
+        elements.extend(_signature_table(shown, omitted))
+    if common:
+        elements.append(Spacer(1, 4))
+        elements.append(Paragraph(escape(_shared_note(common)), styles['BodyTextIndented']))
+    return elements
+
+
+def _shared_signature_flowables(shared, layout):
+    if shared is None or not shared.signatures:
+        return []
+    styles = REPORT_STYLES
+    shown, omitted = _rank_signatures(shared.signatures.values(), layout['max_signatures'])
+    elements = [Paragraph(SHARED_SIGNATURES_TITLE, styles['Heading2Bold']), Spacer(1, 6)]
+    elements.extend(_signature_table(shown, omitted, shared))
+    elements.append(Spacer(1, 18))
+    return elements
 
-            elements.append(Spacer(1, 12))
+
+def _extracted_heading_flowables():
+    styles = REPORT_STYLES
+    return [
+        Paragraph("Extracted Artifacts & Configurations", styles['Heading2Bold']),
+        Spacer(1, 12)
+    ]
+
+
+def _extracted_item_flowables(item: ExtractedConfig):
+    styles = REPORT_STYLES
+    elements = []
+    elements.append(Paragraph(f"Dumped File: {item.dumped_file}", styles['BodyText']))
+    elements.append(Paragraph(f"Resource: {item.resource}", styles['BodyTextIndented']))
+    elements.append(Paragraph(f"Family: {item.family}", styles['BodyTextIndented']))
+    elements.append(Paragraph(f"Version: {item.version}", styles['BodyTextIndented']))
+    elements.append(Paragraph(f"Botnet: {item.botnet}", styles['BodyTextIndented']))
+
+    if item.c2:
+        elements.append(Paragraph("C2 Servers:", styles['BodyText']))
+        for c2 in item.c2:
+            elements.append(Paragraph(c2, styles['BodyTextIndented']))
+
+    if item.keys:
+        elements.append(Paragraph("Keys:", styles['BodyText']))
+        for kind, value in item.keys:
+            elements.append(Paragraph(f"Type: {kind} | Key: {value}", styles['BodyTextIndented']))
+
+    elements.append(Spacer(1, 12))
+    return elements
+
+
+def generate_pdf_report(data, output_file=None, layout=None):
+    """
+    Build the PDF from a triage dict or a TriageReport.
+    Returns the bytes when no output_file (path or file object) is given.
+    """
+    layout = _layout(layout)
+    report = data if isinstance(data, TriageReport) else TriageReport.from_dict(data)
+    buffer = io.BytesIO() if output_file is None else None
+    doc = _new_document(output_file if output_file is not None else buffer)
+
+    elements = _summary_flowables(report.sample)
+    shared = SharedSignatures(report.targets) if layout['compact'] else None
+
+    # targets
+    for target in report.targets:
+        elements.extend(_target_flowables(target, layout, shared))
+    elements.extend(_shared_signature_flowables(shared, layout))
+
+    # extracted configs / payloads
+    if report.extracted:
+        elements.extend(_extracted_heading_flowables())
+        for item in report.extracted:
+            elements.extend(_extracted_item_flowables(item))
 
     doc.build(elements)
+    if buffer is not None:
+        return buffer.getvalue()
+
+
+# streaming ingestion for large entry files
+
+# sentinel yielded after the last item of a streamed array section
+SECTION_END = object()
+
+# how many flowables the layout engine is handed ahead of the current one
+STREAM_LOOKAHEAD = 64
+
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _JSONStream:
+    """Reads JSON values one at a time from a text file without loading the whole document"""
+
+    def __init__(self, fp, chunk_size=1 << 16):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read_more(self):
+        # read at least as much as is already pending, so retrying a large value stays linear
+        data = self.fp.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or '' at end of file"""
+        while True:
+            self.pos = _JSON_WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read_more():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed triage JSON: expected {char!r}, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a number at the very end of the buffer may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self._read_more() and self.pos >= len(self.buf):
+                raise ValueError("Malformed triage JSON: unexpected end of file")
+
+
+def iter_report_sections(fp, array_keys=('targets', 'extracted')):
+    """
+    Walk the top-level object of a triage report.
+    Yields (key, value) per top-level key; keys in array_keys are yielded one
+    (key, item) per element followed by (key, SECTION_END), so only one element
+    is ever held in memory.
+    """
+    stream = _JSONStream(fp)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key in array_keys and stream.peek() == '[':
+            stream.expect('[')
+            if stream.peek() != ']':
+                while True:
+                    yield key, stream.value()
+                    if stream.peek() != ',':
+                        break
+                    stream.expect(',')
+            stream.expect(']')
+            yield key, SECTION_END
+        else:
+            yield key, stream.value()
+        if stream.peek() != ',':
+            break
+        stream.expect(',')
+    stream.expect('}')
+
+
+def read_report_sample(path) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        for key, value in iter_report_sections(f):
+            if key == 'sample':
+                return value or {}
+    return {}
+
+
+def _stream_report_flowables(sections, layout=None, shared=None):
+    """
+    Turn iter_report_sections() events into flowables in report order.
+    Triage writes sample and analysis before targets and extracted; if a file
+    does not, the out-of-order items are held back until they can be placed.
+    """
+    header = {}
+    summary_done = False
+    targets_done = False
+    target_idx = 0
+    held_targets, held_extracted = [], []
+    extracted_started = False
+    shared_done = False
+
+    def targets_flowables(items):
+        nonlocal target_idx
+        for t in items:
+            target_idx += 1
+            yield from _target_flowables(TargetInfo.from_dict(target_idx, t), layout, shared)
+
+    def after_targets():
+        nonlocal shared_done
+        if not shared_done:
+            shared_done = True
+            yield from _shared_signature_flowables(shared, _layout(layout))
+
+    def extracted_flowables(items):
+        nonlocal extracted_started
+        for item in items:
+            if not extracted_started:
+                extracted_started = True
+                yield from _extracted_heading_flowables()
+            yield from _extracted_item_flowables(ExtractedConfig.from_dict(item))
+
+    for key, value in sections:
+        if key in ('sample', 'analysis'):
+            header[key] = value or {}
+            if not summary_done and len(header) == 2:
+                summary_done = True
+                yield from _summary_flowables(SampleInfo.from_dicts(header['sample'], header['analysis']))
+                yield from targets_flowables(held_targets)
+                held_targets = []
+                if targets_done:
+                    yield from after_targets()
+        elif key == 'targets':
+            if value is SECTION_END:
+                targets_done = True
+                if summary_done:
+                    yield from after_targets()
+            elif summary_done:
+                yield from targets_flowables([value])
+            else:
+                held_targets.append(value)
+        elif key == 'extracted':
+            if value is SECTION_END:
+                continue
+            if summary_done and targets_done:
+                yield from extracted_flowables([value])
+            else:
+                held_extracted.append(value)
+
+        if held_extracted and summary_done and targets_done:
+            yield from extracted_flowables(held_extracted)
+            held_extracted = []
+
+    if not summary_done:
+        yield from _summary_flowables(SampleInfo.from_dicts(header.get('sample', {}), header.get('analysis', {})))
+    yield from targets_flowables(held_targets)
+    yield from after_targets()
+    yield from extracted_flowables(held_extracted)
+
+
+class _StreamingFlowables(list):
+    """
+    Flowable list that refills itself from a generator as the layout engine consumes it.
+    doc.build() only ever looks at the head of the list (len, [0], [:i], del, insert),
+    so keeping STREAM_LOOKAHEAD items buffered is enough for keepWithNext and splitting.
+    """
+
+    def __init__(self, flowables):
+        super().__init__()
+        self._source = iter(flowables)
+        self._refill()
+
+    def _refill(self):
+        while self._source is not None and super().__len__() < STREAM_LOOKAHEAD:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._refill()
+        return super().__len__()
+
+
+def generate_pdf_report_from_file(path, output_file=None, layout=None):
+    """Like generate_pdf_report, but streams the triage JSON from disk section by section"""
+    layout = _layout(layout)
+    shared = None
+    if layout['compact']:
+        # an extra streaming pass, holding only signature names, finds the shared ones up front
+        with open(path, 'r') as f:
+            targets = (value for key, value in iter_report_sections(f) if key == 'targets' and value is not SECTION_END)
+            shared = SharedSignatures(TargetInfo.from_dict(idx, t) for idx, t in enumerate(targets, start=1))
+
+    buffer = io.BytesIO() if output_file is None else None
+    doc = _new_document(output_file if output_file is not None else buffer)
+    with open(path, 'r') as f:
+        doc.build(_StreamingFlowables(_stream_report_flowables(iter_report_sections(f), layout, shared)))
+    if buffer is not None:
+        return buffer.getvalue()
+
+
+# Markdown / HTML backends
+
+OUTPUT_FORMATS = ('pdf', 'markdown', 'html')
+
+_MARKDOWN_SPECIAL = re.compile(r'([\\`*_\[\]<>|])')
+
+
+def _md(value) -> str:
+    # one line, with anything markdown would interpret escaped
+    return _MARKDOWN_SPECIAL.sub(r'\\\1', " ".join(str(value).split()))
+
+
+class _MarkdownWriter:
+    def __init__(self):
+        self.lines = []
+
+    def heading(self, level, text):
+        self.lines.extend([f"{'#' * level} {_md(text)}", ''])
+
+    def fields(self, pairs):
+        # trailing double space is a markdown line break
+        self.lines.extend([f"**{_md(name)}:** {_md(value)}  " for name, value in pairs] + [''])
+
+    def note(self, text):
+        self.lines.extend([f"_{_md(text)}_", ''])
+
+    def table(self, headers, rows):
+        self.lines.append('| ' + ' | '.join(_md(h) for h in headers) + ' |')
+        self.lines.append('|' + ' --- |' * len(headers))
+        self.lines.extend('| ' + ' | '.join(_md(cell) for cell in row) + ' |' for row in rows)
+        self.lines.append('')
+
+    def render(self) -> str:
+        return '\n'.join(self.lines)
+
+
+class _HTMLWriter:
+    STYLE = (
+        "body{font-family:Helvetica,Arial,sans-serif;font-size:13px;margin:24px}"
+        "h1{text-align:center}h2{color:darkblue}"
+        "table{border-collapse:collapse;margin-bottom:12px}"
+        "th,td{border:1px solid #444;padding:3px 6px;text-align:left;vertical-align:top}"
+        "th{background:#ddd}.note{font-style:italic}"
+    )
+
+    def __init__(self):
+        self.parts = []
+
+    def heading(self, level, text):
+        self.parts.append(f"<h{level}>{html_escape(str(text))}</h{level}>")
+
+    def fields(self, pairs):
+        self.parts.append('<p>' + '<br>'.join(
+            f"<b>{html_escape(str(name))}:</b> {html_escape(str(value))}" for name, value in pairs
+        ) + '</p>')
+
+    def note(self, text):
+        self.parts.append(f"<p class=\"note\">{html_escape(str(text))}</p>")
+
+    def table(self, headers, rows):
+        head = ''.join(f"<th>{html_escape(str(h))}</th>" for h in headers)
+        body = ''.join(
+            '<tr>' + ''.join(f"<td>{html_escape(str(cell))}</td>" for cell in row) + '</tr>' for row in rows
+        )
+        self.parts.append(f"<table><tr>{head}</tr>{body}</table>")
+
+    def render(self) -> str:
+        return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Hatching Triage Sandbox Report</title>"
+                f"<style>{self.STYLE}</style></head><body>" + '\n'.join(self.parts) + "</body></html>")
+
+
+def _signature_rows(signatures, shared=None):
+    rows = []
+    for sig in signatures:
+        row = [sig.score, sig.name, sig.desc, ", ".join(sig.tags)]
+        if shared:
+            row.append(", ".join(shared.target_refs(sig.name)))
+        rows.append(row)
+    return rows
+
+
+def _write_report(report: TriageReport, layout, writer):
+    """Walk the report model in PDF order, emitting headings, field lists, notes and tables"""
+    sample = report.sample
+    shared = SharedSignatures(report.targets) if layout['compact'] else None
+    signature_headers = ['Score', 'Signature', 'Description', 'Tags']
+
+    writer.heading(1, "Hatching Triage Sandbox Report")
+    writer.fields([('Sample ID', sample.id), ('Target File', sample.target), ('Overall Score', sample.score)])
+    writer.heading(2, "Sample Metadata")
+    writer.table(['Field', 'Value'], _sample_rows(sample))
+
+    for target in report.targets:
+        writer.heading(2, f"Target #{target.index}")
+        writer.table(['Field', 'Value'], _target_rows(target))
+        extra = [(name, ", ".join(values)) for name, values in (('Tags', target.tags), ('Family', target.family)) if values]
+        if extra:
+            writer.fields(extra)
+
+        shown, omitted, common = select_signatures(target.signatures, layout, shared)
+        if shown or common:
+            writer.heading(3, "Signatures")
+        if shown:
+            writer.table(signature_headers, _signature_rows(shown))
+        if omitted:
+            writer.note(_omitted_note(shown, omitted))
+        if common:
+            writer.note(_shared_note(common))
+
+    if shared is not None and shared.signatures:
+        shown, omitted = _rank_signatures(shared.signatures.values(), layout['max_signatures'])
+        writer.heading(2, SHARED_SIGNATURES_TITLE)
+        writer.table(signature_headers + ['Targets'], _signature_rows(shown, shared))
+        if omitted:
+            writer.note(_omitted_note(shown, omitted))
+
+    if report.extracted:
+        writer.heading(2, "Extracted Artifacts & Configurations")
+        for item in report.extracted:
+            writer.heading(3, f"Dumped File: {item.dumped_file}")
+            writer.table(['Field', 'Value'], _extracted_rows(item))
+
+
+def render_text_report(report: TriageReport, output_format='markdown', layout=None) -> str:
+    """Markdown or HTML rendering of the same content as the PDF, without ReportLab"""
+    writer = _MarkdownWriter() if output_format == 'markdown' else _HTMLWriter()
+    _write_report(report, _layout(layout), writer)
+    return writer.render()
+
+
+def text_report_entry(content, output_format):
+    return {
+        'Type': entryTypes['note'],
+        'ContentsFormat': formats['markdown'] if output_format == 'markdown' else formats['html'],
+        'Contents': content
+    }
+
+
+def _render_report_job(source, cache=None, layout=None, output_format='pdf'):
+    """Source is ('path', file path) or ('json', JSON text or an already parsed dict)"""
+    # runs inside a pool worker, so parsing happens there too
+    kind, value = source
+    if output_format != 'pdf':
+        if kind == 'path':
+            report = TriageReport.from_file(value)
+        else:
+            report = TriageReport.from_dict(json.loads(value) if isinstance(value, str) else value)
+        return report.sample.id, render_text_report(report, output_format, layout)
+
+    if kind == 'path':
+        return read_report_sample(value).get('id'), render_report_file(value, cache, layout)
+
+    data = json.loads(value) if isinstance(value, str) else value
+    sample_id = (data.get('sample') or {}).get('id')
+    return sample_id, render_report(data, cache, layout)
+
+
+def _can_use_process_pool():
+    # XSOAR may exec the script under a module name workers cannot import,
+    # in which case the render function cannot be pickled for them
+    try:
+        pickle.dumps(_render_report_job)
+        return True
+    except Exception:
+        return False
+
+
+def render_reports(sources: List[Tuple[str, Any]], max_workers: Optional[int] = None,
+                   cache: Optional[RenderCache] = None, layout=None,
+                   output_format='pdf') -> List[Dict[str, Any]]:
+    """
+    Render one report per source, PDFs across a process pool.
+    Results come back in input order as dicts with sample_id, report and error;
+    a failing sample does not stop the rest of the batch.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(sources)
+    workers = max(1, min(max_workers or MAX_BATCH_WORKERS, len(sources), os.cpu_count() or 1))
+
+    # text renderers finish in milliseconds, not worth a process start each
+    if output_format == 'pdf' and workers > 1 and _can_use_process_pool():
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_render_report_job, source, cache, layout, output_format) for source in sources]
+                for idx, future in enumerate(futures):
+                    try:
+                        sample_id, report = future.result()
+                        results[idx] = {'sample_id': sample_id, 'report': report, 'error': None}
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        results[idx] = {'sample_id': None, 'report': None, 'error': str(e)}
+        except (BrokenProcessPool, OSError) as e:
+            # no usable worker processes in this container, finish in-process
+            demisto.debug(f"Process pool unavailable ({e}), rendering remaining reports sequentially")
+
+    for idx, source in enumerate(sources):
+        if results[idx] is not None:
+            continue
+        try:
+            sample_id, report = _render_report_job(source, cache, layout, output_format)
+            results[idx] = {'sample_id': sample_id, 'report': report, 'error': None}
+        except Exception as e:
+            results[idx] = {'sample_id': None, 'report': None, 'error': str(e)}
+    return results
+
+
+def collect_batch_sources(triage_jsons, entry_ids) -> List[Tuple[str, Any]]:
+    """Turn the batch arguments into render sources; entry files are resolved here, parsed in the workers"""
+    sources = []
+    if triage_jsons:
+        items = json.loads(triage_jsons) if isinstance(triage_jsons, str) else triage_jsons
+        if isinstance(items, dict):
+            items = [items]
+        sources.extend(('json', item) for item in items)
+    for entry_id in entry_ids:
+        sources.append(('path', demisto.getFilePath(entry_id).get('path')))
+    return sources
+
+
+def cache_from_args(args) -> Optional[RenderCache]:
+    if not argToBoolean(args.get('use_cache', 'true')):
+        return None
+    max_mb = float(args.get('cache_max_mb') or DEFAULT_CACHE_MAX_MB)
+    return RenderCache(args.get('cache_dir') or DEFAULT_CACHE_DIR, int(max_mb * 1024 * 1024))
+
+
+def layout_from_args(args) -> Dict[str, Any]:
+    max_signatures = args.get('max_signatures')
+    # 0 is meaningful (no cap), so only a missing or blank argument falls back to the default
+    if max_signatures is None or str(max_signatures).strip() == '':
+        max_signatures = DEFAULT_LAYOUT['max_signatures']
+    return {
+        'compact': argToBoolean(args.get('compact', 'false')),
+        'max_signatures': int(max_signatures)
+    }
+
+
+def output_format_from_args(args) -> str:
+    output_format = (args.get('output_format') or 'pdf').lower()
+    if output_format not in OUTPUT_FORMATS:
+        return_error(f"Unsupported output_format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}.")
+    return output_format
+
+
+def batch_main(args):
+    sources = collect_batch_sources(args.get('triage_jsons'), argToList(args.get('entry_ids')))
+    if not sources:
+        return_error("No triage JSON data provided. Please supply 'triage_jsons' or 'entry_ids'.")
+
+    max_workers = int(args.get('max_workers') or MAX_BATCH_WORKERS)
+    output_format = output_format_from_args(args)
+    results = render_reports(sources, max_workers, cache_from_args(args), layout_from_args(args), output_format)
+    entries = []
+    for idx, result in enumerate(results, start=1):
+        if result['error']:
+            entries.append({
+                'Type': entryTypes['error'],
+                'ContentsFormat': formats['text'],
+                'Contents': f"Failed to render triage report #{idx}: {result['error']}"
+            })
+            continue
+        if output_format != 'pdf':
+            entries.append(text_report_entry(result['report'], output_format))
+            continue
+        file_name = f"triage_report_{result['sample_id'] or idx}.pdf"
+        entries.append(fileResult(file_name, result['report'], file_type=9))  # file_type=9 for PDF
+
+    return_results(entries)
 
 
 def main():
     args = demisto.args()
+    if args.get('triage_jsons') or args.get('entry_ids'):
+        batch_main(args)
+        return
+
     triage_json = args.get('triage_json')
     entry_id = args.get('entry_id')
+    output_format = output_format_from_args(args)
+    layout = layout_from_args(args)
+
+    if output_format != 'pdf':
+        # quick war-room view: no ReportLab build, posted inline
+        if triage_json:
+            report = TriageReport.from_dict(json.loads(triage_json))
+        elif entry_id:
+            report = TriageReport.from_file(demisto.getFilePath(entry_id).get('path'))
+        else:
+            return_error("No triage JSON data provided. Please supply 'triage_json' or 'entry_id'.")
+        return_results(text_report_entry(render_text_report(report, output_format, layout), output_format))
+        return
 
-    # load the JSON data
-    data = {}
+    # render straight into memory and return as a file result to the war room
+    file_data = None
     if triage_json:
         # if JSON is provided directly as a string
         data = json.loads(triage_json)
+        file_data = render_report(data, cache_from_args(args), layout)
     elif entry_id:
-        # if an entry_id is provided, fetch the file and load JSON
+        # if an entry_id is provided, stream the file rather than loading it whole
         file_info = demisto.getFilePath(entry_id)
         file_path = file_info.get('path')
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        file_data = render_report_file(file_path, cache_from_args(args), layout)
     else:
         return_error("No triage JSON data provided. Please supply 'triage_json' or 'entry_id'.")
 
-    # create a temporary PDF file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_pdf:
-        pdf_path = tmp_pdf.name
-
-    # generate the PDF report
-    generate_pdf_report(data, pdf_path)
-
-    # read the PDF and return as a file result to the war room
-    with open(pdf_path, 'rb') as f:
-        file_data = f.read()
-
-    # clean up temp file after reading
-    os.remove(pdf_path)
-
     return_results(fileResult("triage_report.pdf", file_data, file_type=9))  # file_type=9 for PDF
 
 if __name__ in ("__main__", "__builtin__", "builtins"):
@@ -0,0 +1,288 @@
+"""
+local XSIAM stand-in server
+serves the three public API endpoints used by XSIAMClient in xsiam-prod-dev-copy.py
+so the copy job can be dry-run and benchmarked without real tenants
+
+    python xsiam_mock_server.py --port 8080 --incidents 500 --latency 0.05 --throttle-rate 0.02
+"""
+
+import gzip
+import json
+import random
+import threading
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlparse, parse_qs
+
+INCIDENTS_PATH = '/public_api/v1/incidents/get_incidents'
+ALERTS_PATH = '/public_api/v1/alerts/get_alerts_by_filter'
+INSERT_PATH = '/public_api/v1/alerts/insert_parsed_alerts'
+STATS_PATH = '/_mock/stats'
+
+class MockXSIAMState:
+    """Synthetic tenant data plus request counters shared by all handler threads"""
+
+    def __init__(self, incidents: int = 100, alerts_per_incident: int = 10, days_back: int = 7,
+                 latency: float = 0.0, latency_jitter: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 1.0, page_size: int = 100, seed: int = 0):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.alerts_per_incident = alerts_per_incident
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # Incidents are spread evenly over the window, newest first
+        now_ms = int(time.time() * 1000)
+        spacing_ms = int(days_back * 86400 * 1000 / max(1, incidents))
+        self.incidents = [
+            {
+                'incident_id': str(100000 + i),
+                'description': f'Mock incident {i}',
+                'creation_time': now_ms - i * spacing_ms - 1,
+                'severity': self._random.choice(['low', 'medium', 'high', 'critical']),
+                'alert_count': alerts_per_incident
+            }
+            for i in range(incidents)
+        ]
+        self.incidents_by_id = {incident['incident_id']: incident for incident in self.incidents}
+
+        self.stats = {
+            'connections': 0,
+            'requests': 0,
+            'throttled': 0,
+            'alerts_inserted': 0,
+            'insert_requests': 0,
+            'bytes_received': 0
+        }
+
+    def count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def should_throttle(self) -> bool:
+        with self._lock:
+            return self.throttle_rate > 0 and self._random.random() < self.throttle_rate
+
+    def service_delay(self) -> float:
+        with self._lock:
+            jitter = self._random.uniform(-self.latency_jitter, self.latency_jitter) if self.latency_jitter else 0.0
+        return max(0.0, self.latency + jitter)
+
+    def alerts_for(self, incident_id: str) -> List[Dict[str, Any]]:
+        """Build an incident's alerts on demand so large mock tenants stay cheap"""
+        incident = self.incidents_by_id.get(incident_id)
+        if incident is None:
+            return []
+        return [
+            {
+                'alert_id': f'{incident_id}-{n}',
+                'incident_id': incident_id,
+                'alert_name': f'Mock alert {n} for incident {incident_id}',
+                'description': 'Suspicious process execution observed on endpoint',
+                'severity': incident['severity'],
+                'category': 'Execution',
+                'host_name': f'host-{int(incident_id) % 97}',
+                'user_name': f'user{n}',
+                'creation_time': incident['creation_time'] + n,
+                'detection_timestamp': incident['creation_time'] + n,
+                'status': 'new',
+                'tenant_id': 'mock-tenant',
+                'mitre_technique_id_and_name': ['T1059 - Command and Scripting Interpreter']
+            }
+            for n in range(self.alerts_per_incident)
+        ]
+
+def _parse_time_filters(filters: List[str]):
+    """Turn 'created_time:gte:<ms>' style filters into (lower, upper) bounds"""
+    lower, upper = None, None
+    for item in filters:
+        field, _, rest = item.partition(':')
+        operator, _, value = rest.partition(':')
+        if field != 'created_time' or not value:
+            continue
+        if operator in ('gte', 'gt'):
+            lower = int(value) + (1 if operator == 'gt' else 0)
+        elif operator in ('lte', 'lt'):
+            upper = int(value) - (1 if operator == 'lt' else 0)
+    return lower, upper
+
+def _page_bounds(query: Dict[str, List[str]], page_size: int):
+    search_from = int(query.get('search_from', ['0'])[0])
+    search_to = int(query.get('search_to', [str(search_from + page_size)])[0])
+    # Like the real API, a page never exceeds the server's page size
+    return search_from, min(search_to, search_from + page_size)
+
+class MockXSIAMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state: MockXSIAMState = None
+
+    def setup(self):
+        # One handler instance per TCP connection; keep-alive reuses it
+        super().setup()
+        self.state.count('connections')
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == STATS_PATH:
+            self._send_json(200, self.state.stats)
+            return
+        if not self._admit():
+            return
+
+        if url.path == INCIDENTS_PATH:
+            lower, upper = _parse_time_filters(query.get('filter', []))
+            incidents = [
+                incident for incident in self.state.incidents
+                if (lower is None or incident['creation_time'] >= lower) and
+                   (upper is None or incident['creation_time'] <= upper)
+            ]
+            if query.get('sort', [''])[0].endswith(':asc'):
+                incidents = list(reversed(incidents))
+            search_from, search_to = _page_bounds(query, self.state.page_size)
+            self._send_json(200, {'reply': {
+                'total_count': len(incidents),
+                'result_count': len(incidents[search_from:search_to]),
+                'incidents': incidents[search_from:search_to]
+            }})
+        elif url.path == ALERTS_PATH:
+            alerts = []
+            for incident_id in query.get('incident_id', []):
+                alerts.extend(self.state.alerts_for(incident_id))
+            search_from, search_to = _page_bounds(query, self.state.page_size)
+            self._send_json(200, {'reply': {
+                'total_count': len(alerts),
+                'result_count': len(alerts[search_from:search_to]),
+                'alerts': alerts[search_from:search_to]
+            }})
+        else:
+            self._send_json(404, {'reply': {'err_msg': f'Unknown endpoint {url.path}'}})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.state.count('bytes_received', len(body))
+        if not self._admit():
+            return
+
+        if url.path != INSERT_PATH:
+            self._send_json(404, {'reply': {'err_msg': f'Unknown endpoint {url.path}'}})
+            return
+
+        try:
+            if self.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            alerts = json.loads(body).get('alerts')
+        except (ValueError, OSError):
+            alerts = None
+        if not isinstance(alerts, list):
+            self._send_json(400, {'reply': {'err_msg': 'Request body must contain an alerts list'}})
+            return
+
+        self.state.count('insert_requests')
+        self.state.count('alerts_inserted', len(alerts))
+        self._send_json(200, {'reply': True})
+
+    def _admit(self) -> bool:
+        """Apply simulated latency and throttling; False if a 429 was sent"""
+        self.state.count('requests')
+        delay = self.state.service_delay()
+        if delay:
+            time.sleep(delay)
+        if self.state.should_throttle():
+            self.state.count('throttled')
+            self._send_json(429, {'reply': {'err_msg': 'Rate limit exceeded'}},
+                            headers={'Retry-After': str(self.state.retry_after)})
+            return False
+        return True
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+class MockXSIAMServer:
+    """Runs the mock API on a background thread; usable as a context manager"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, **state_options):
+        self.state = MockXSIAMState(**state_options)
+        handler = type('BoundMockXSIAMHandler', (MockXSIAMHandler,), {'state': self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockXSIAMServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='mock-xsiam', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stand-in for the XSIAM public API')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port to bind, 0 for any free port (default: 8080)')
+    parser.add_argument('--incidents', type=int, default=100, help='Number of mock incidents')
+    parser.add_argument('--alerts-per-incident', type=int, default=10, help='Alerts generated per incident')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of latency added to every request')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='Uniform +/- jitter on the latency')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--page-size', type=int, default=100, help='Maximum results returned per page')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for generated data and throttling')
+
+    args = parser.parse_args()
+
+    server = MockXSIAMServer(
+        host=args.host,
+        port=args.port,
+        incidents=args.incidents,
+        alerts_per_incident=args.alerts_per_incident,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        page_size=args.page_size,
+        seed=args.seed
+    )
+    # The benchmark reads this line to find the bound port
+    print(f'Mock XSIAM listening on {server.url}', flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == '__main__':
+    main()